@@ -2,6 +2,4 @@
 API package for FastAPI routers
 """
 
-from fastapi import APIRouter
-
-__all__ = ["ingest", "search", "analysis"]
+__all__ = ["ingest", "search", "analysis", "orchestrator"]
@@ -1,15 +1,45 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
 from typing import Optional
+import logging
+import re
 
+from api.dependencies import json_body, json_body_openapi
+from api.errors import HTTPErrorMap
 from models.requests import CodeQLScanRequest
 from models.responses import CodeQLResponse
-from services.codeql_service import CodeQLService
+from services.codeql_service import ALLOWED_QUERY_SUITES, get_codeql_service
 
-router = APIRouter(prefix="/analysis", tags=["analysis"])
-codeql_service = CodeQLService()
+# Setup logging
+logger = logging.getLogger(__name__)
 
-@router.post("/codeql", response_model=CodeQLResponse)
-async def run_codeql_scan(request: CodeQLScanRequest):
+router = APIRouter(prefix="/analysis")
+codeql_service = get_codeql_service()
+
+# Static part of the 422 response, built once
+ALLOWED_QUERY_SUITES_DETAIL = tuple(sorted(ALLOWED_QUERY_SUITES))
+
+# Service exceptions -> structured details; RuntimeError and the rest are handled in the route
+_CODEQL_SCAN_ERRORS = HTTPErrorMap(logger, "CodeQL analysis failed", {
+    FileNotFoundError: (404, "Repository not found", {
+        "error": "Repository not found",
+        "message": "{error}",
+        "hint": "Run POST /api/ingest first"
+    }),
+    ValueError: (422, "Validation error", {"error": "Validation error", "message": "{error}"}),
+    TimeoutError: (504, "Operation timeout", {"error": "Operation timeout", "message": "{error}"}),
+})
+_NOT_AVAILABLE_RE = re.compile(r"not available", re.IGNORECASE)
+
+
+@router.post(
+    "/codeql",
+    response_model=CodeQLResponse,
+    openapi_extra=json_body_openapi(CodeQLScanRequest)
+)
+async def run_codeql_scan(
+    request: CodeQLScanRequest = Depends(json_body(CodeQLScanRequest))
+):
     """
     Run CodeQL security and quality analysis on an ingested repository.
     
@@ -54,52 +84,29 @@ async def run_codeql_scan(request: CodeQLScanRequest):
                 detail={
                     "error": "Invalid query suite",
                     "message": str(e),
-                    "allowed_suites": list(codeql_service.ALLOWED_QUERY_SUITES)
+                    "allowed_suites": ALLOWED_QUERY_SUITES_DETAIL
                 }
             )
         
-        # Run the full analysis pipeline
-        result = codeql_service.analyze_repository(request)
-        return result
+        # Run the full analysis pipeline off the event loop
+        result = await codeql_service.analyze_repository_async(request)
         
-    except FileNotFoundError as e:
-        # Repository not ingested
-        raise HTTPException(
-            status_code=404,
-            detail={
-                "error": "Repository not found",
-                "message": str(e),
-                "hint": "Run POST /api/ingest first"
-            }
-        )
+        # Already a validated CodeQLResponse: serialize it once in pydantic-core
+        # instead of re-validating it against response_model and re-encoding
+        return Response(content=result.model_dump_json(), media_type="application/json")
         
-    except ValueError as e:
-        # Validation error (repo_id format, language mismatch, etc.)
-        raise HTTPException(
-            status_code=422,
-            detail={
-                "error": "Validation error",
-                "message": str(e)
-            }
-        )
-        
-    except TimeoutError as e:
-        # Subprocess timeout
-        raise HTTPException(
-            status_code=504,
-            detail={
-                "error": "Operation timeout",
-                "message": str(e)
-            }
-        )
+    except _CODEQL_SCAN_ERRORS.expected as e:
+        # Repository not ingested, validation error (repo_id format, language
+        # mismatch, etc.) or subprocess timeout
+        raise _CODEQL_SCAN_ERRORS.to_http_exception(e)
         
     except RuntimeError as e:
         # CodeQL errors, subprocess failures, etc.
         error_message = str(e)
         
         # Check if it's a CodeQL availability issue
-        if "not available" in error_message.lower():
-            raise HTTPException(status_code=503, detail=str(e))
+        if _NOT_AVAILABLE_RE.search(error_message):
+            raise HTTPException(status_code=503, detail=error_message)
         
         # Other runtime errors
         raise HTTPException(
@@ -114,12 +121,11 @@ async def run_codeql_scan(request: CodeQLScanRequest):
         # Re-raise HTTP exceptions (don't catch them in generic handler)
         raise
         
-    except Exception as e:
+    except Exception:
         # Catch-all for unexpected errors
         # Log full traceback server-side but don't expose it
-        import traceback
-        print(f"❌ Unexpected error in CodeQL analysis:")
-        print(traceback.format_exc())
+        # (formatted on the logging listener thread, not here)
+        logger.exception("Unexpected error in CodeQL analysis")
         
         raise HTTPException(
             status_code=500,
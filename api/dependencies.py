@@ -0,0 +1,78 @@
+"""
+API Dependencies
+Request body parsing shared by the routers
+"""
+
+from fastapi import Request
+from functools import lru_cache
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def json_body(model: Type[ModelT]) -> Callable[[Request], Awaitable[ModelT]]:
+    """
+    Build a dependency that validates the raw request body as `model`
+
+    FastAPI's default body handling runs json.loads into a dict and then
+    validates the dict. model_validate_json parses and validates the bytes
+    in a single pass in pydantic-core.
+
+    Args:
+        model: Pydantic model for the JSON body
+
+    Returns:
+        Async dependency returning a validated `model` instance
+
+    Raises:
+        RequestValidationError: If the body is not valid JSON or fails validation (422)
+    """
+    async def parse_body(request: Request) -> ModelT:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            # Same shape as FastAPI's own body errors ("loc" starts with "body", "ctx" kept)
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ])
+
+    return parse_body
+
+
+@lru_cache(maxsize=None)
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    OpenAPI requestBody for routes that parse their body with json_body()
+
+    The body is no longer a declared parameter, so FastAPI cannot document it;
+    pass this as the route's `openapi_extra`. Cached per model: routes sharing
+    a body model (the execute endpoints) share one generated schema.
+
+    Args:
+        model: Pydantic model for the JSON body
+
+    Returns:
+        Dict with a requestBody entry (nested $defs inlined)
+    """
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def inline(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref and ref.startswith("#/$defs/"):
+                return inline(defs[ref[len("#/$defs/"):]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(item) for item in node]
+        return node
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": inline(schema)}}
+        }
+    }
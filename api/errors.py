@@ -0,0 +1,84 @@
+"""
+API Error Mapping
+Translate service exceptions into HTTP errors for the routers
+"""
+
+from contextlib import contextmanager
+from fastapi import HTTPException, status
+from typing import Dict, Iterator, Tuple, Type, Union
+import logging
+
+# Detail template: a string, or a dict of string templates for structured details
+DetailTemplate = Union[str, Dict[str, str]]
+
+# Exception type -> (status code, log title, detail template)
+ErrorMap = Dict[Type[Exception], Tuple[int, str, DetailTemplate]]
+
+
+class HTTPErrorMap:
+    """
+    Shared try/except ladder for a route
+
+    Used as `with errors(**context):` around a handler body. Exceptions
+    listed in the map become HTTPExceptions with their status code and
+    detail; anything else is logged with its traceback and returned as a
+    generic 500 so internals never reach the client.
+
+    Detail templates are formatted with the keyword context plus `error`
+    (the exception), e.g. "Plan '{plan_id}' not found."; each value of a
+    dict template is formatted the same way.
+
+    Routes that need their own handling for other exceptions can catch
+    `expected` themselves and raise `to_http_exception(e)`.
+    """
+
+    def __init__(self, logger: logging.Logger, failure: str, errors: ErrorMap):
+        """
+        Args:
+            logger: Router logger (keeps the module name in log records)
+            failure: Title for unexpected errors, e.g. "Plan creation failed"
+            errors: Expected exception types and how to report them
+        """
+        self.logger = logger
+        self.failure = failure
+        self.errors = errors
+        self.expected = tuple(errors)
+
+    def to_http_exception(self, error: Exception, **context: object) -> HTTPException:
+        """
+        Log an exception of an `expected` type and build its HTTPException
+
+        Args:
+            error: Exception whose type (or a base class) is in the map
+            **context: Extra values for the detail template
+
+        Returns:
+            HTTPException with the mapped status code and formatted detail
+        """
+        # Walk the MRO so subclasses (e.g. UnicodeDecodeError) map like their base
+        for exc_type in type(error).__mro__:
+            if exc_type in self.errors:
+                status_code, title, template = self.errors[exc_type]
+                break
+
+        self.logger.error("%s: %s", title, error)
+        if isinstance(template, dict):
+            detail = {key: value.format(error=error, **context) for key, value in template.items()}
+        else:
+            detail = template.format(error=error, **context)
+        return HTTPException(status_code=status_code, detail=detail)
+
+    @contextmanager
+    def __call__(self, **context: object) -> Iterator[None]:
+        try:
+            yield
+        except HTTPException:
+            raise
+        except self.expected as e:
+            raise self.to_http_exception(e, **context) from e
+        except Exception as e:
+            self.logger.error("%s: %s", self.failure, e, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"{self.failure}. Please try again."
+            ) from e
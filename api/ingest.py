@@ -3,10 +3,15 @@ Ingest API Router
 Endpoints for repository ingestion
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response
+from typing import Dict, Literal, Union
+import asyncio
 import logging
 
+import orjson
+
+from api.dependencies import json_body, json_body_openapi
 from models.requests import IngestRequest
 from models.responses import IngestResponse
 from services.ingest_service import IngestService
@@ -17,6 +22,9 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Shared service instance (stateless apart from configured paths)
+ingest_service = IngestService()
+
 
 @router.post(
     "/ingest",
@@ -24,6 +32,7 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
     summary="Ingest a repository",
     description="Clone and process a repository for analysis. Generates repo.md and tree.json files.",
+    openapi_extra=json_body_openapi(IngestRequest),
     responses={
         200: {
             "description": "Repository ingested successfully",
@@ -45,10 +54,11 @@ router = APIRouter()
         },
         400: {"description": "Invalid request parameters"},
         500: {"description": "Internal server error"}
-    },
-    tags=["Ingest"]
+    }
 )
-async def ingest_repository(request: IngestRequest) -> IngestResponse:
+async def ingest_repository(
+    request: IngestRequest = Depends(json_body(IngestRequest))
+) -> Response:
     """
     Ingest a repository from URL or local path
     
@@ -60,10 +70,13 @@ async def ingest_repository(request: IngestRequest) -> IngestResponse:
     """
     try:
         logger.info(f"Ingesting repository: {request.source}")
-        service = IngestService()
-        response = service.ingest_repository(request)
+        # Clone/copy and repo.md generation block; keep them off the event loop
+        response = await asyncio.to_thread(ingest_service.ingest_repository, request)
         logger.info(f"Ingestion completed: {response.repo_id}")
-        return response
+        
+        # Already a validated IngestResponse: serialize it once in pydantic-core
+        # instead of re-validating it against response_model and re-encoding
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -100,31 +113,60 @@ async def ingest_repository(request: IngestRequest) -> IngestResponse:
                         "repo_id": "a1b2c3d4",
                         "content": "# Repository Content\n\n## File: main.py\n..."
                     }
+                },
+                "text/markdown": {
+                    "example": "# Repository Content\n\n## File: main.py\n..."
                 }
             }
         },
+        304: {"description": "Content unchanged (If-None-Match matched)"},
         404: {"description": "Repository not found"},
         500: {"description": "Internal server error"}
-    },
-    tags=["Ingest"]
+    }
 )
-async def get_repository_content(repo_id: str) -> Dict[str, str]:
+async def get_repository_content(
+    repo_id: str,
+    request: Request,
+    format: Literal["json", "markdown"] = Query(
+        "json",
+        description="'markdown' streams repo.md as-is instead of wrapping it in JSON"
+    )
+) -> Union[Dict[str, str], Response]:
     """
     Get the processed content of an ingested repository
     
     - **repo_id**: Unique repository identifier
+    - **format**: `json` (default) or `markdown`. Markdown is also used when
+      the client sends `Accept: text/markdown`.
     
-    Returns the repo.md content as a string.
+    Returns the repo.md content as a string, or the raw file in markdown mode.
+    Markdown responses carry an ETag and honor If-None-Match.
     """
     try:
         logger.info(f"Retrieving content for repo: {repo_id}")
-        service = IngestService()
-        content = service.get_repo_content(repo_id)
+        
+        if format == "markdown" or "text/markdown" in request.headers.get("accept", ""):
+            repo_md_path = ingest_service.get_repo_md_path(repo_id)
+            stat = repo_md_path.stat()
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            
+            # Streamed from disk in chunks; never loaded into memory whole
+            return FileResponse(
+                repo_md_path,
+                media_type="text/markdown; charset=utf-8",
+                headers={"ETag": etag}
+            )
+        
+        content = await asyncio.to_thread(ingest_service.get_repo_content, repo_id)
         logger.info(f"Content retrieved for repo: {repo_id}")
-        return {
-            "repo_id": repo_id,
-            "content": content
-        }
+        # repo.md can be megabytes; orjson escapes it far faster than json.dumps
+        return Response(
+            content=orjson.dumps({"repo_id": repo_id, "content": content}),
+            media_type="application/json"
+        )
         
     except FileNotFoundError as e:
         logger.error(f"Repository not found: {str(e)}")
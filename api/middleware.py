@@ -3,13 +3,17 @@ API Middleware
 CORS, rate limiting, request ID tracking, and logging
 """
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from typing import Optional
 import time
-import uuid
+import itertools
+import secrets
 import logging
 
 from utils.logger import set_request_id, clear_request_id, get_logger
@@ -20,76 +24,118 @@ logger = get_logger(__name__)
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
+# Request IDs: random per-process prefix + counter (req_ + 12 hex chars, more
+# once the counter outgrows 6 digits; it is never wrapped).
+# Trace IDs only need to be unique, not unpredictable, so no CSPRNG per request.
+_REQUEST_ID_PREFIX = secrets.token_hex(3)
+_request_counter = itertools.count()
+MAX_CLIENT_REQUEST_ID_LENGTH = 64
 
-def setup_middleware(app: FastAPI):
+
+def next_request_id() -> str:
     """
-    Configure all middleware for the application
+    Generate a process-unique request ID
+    """
+    return f"req_{_REQUEST_ID_PREFIX}{next(_request_counter):06x}"
+
+
+def _client_request_id(headers: Headers) -> Optional[str]:
+    """
+    Return the client-supplied X-Request-ID if it is safe to echo, else None
+    """
+    request_id = headers.get("x-request-id")
+    if (
+        request_id
+        and len(request_id) <= MAX_CLIENT_REQUEST_ID_LENGTH
+        and request_id.isascii()
+        and request_id.isprintable()
+    ):
+        return request_id
+    return None
+
+
+class RequestContextMiddleware:
+    """
+    Request ID tracking, request logging and metrics in one ASGI middleware
+    
+    Implemented as raw ASGI rather than @app.middleware("http"): each
+    BaseHTTPMiddleware layer adds a task and response-body relaying per
+    request, and this replaces two of them.
     """
     
-    # 1. Request ID Middleware (first - sets context for all subsequent middleware)
-    @app.middleware("http")
-    async def add_request_id(request: Request, call_next):
-        """
-        Add unique request ID to each request
-        """
-        request_id = f"req_{uuid.uuid4().hex[:12]}"
-        request.state.request_id = request_id
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = _client_request_id(Headers(scope=scope)) or next_request_id()
+        scope.setdefault("state", {})["request_id"] = request_id
+        
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        status_code = 500  # Reported if the app fails before sending a response
         
         # Set in logging context
         set_request_id(request_id)
+        start_ns = time.perf_counter_ns()
+        
+        # Skip building log extras when INFO is disabled
+        log_enabled = logger.isEnabledFor(logging.INFO)
+        if log_enabled:
+            logger.info(
+                "Request started",
+                extra={
+                    "method": method,
+                    "path": path,
+                    "client": client[0] if client else "unknown"
+                }
+            )
+        
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
         
         try:
-            response = await call_next(request)
-            response.headers["X-Request-ID"] = request_id
-            return response
+            await self.app(scope, receive, send_with_request_id)
         finally:
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            if log_enabled:
+                logger.info(
+                    "Request completed",
+                    extra={
+                        "status_code": status_code,
+                        "duration_ms": round(duration_ms, 2)
+                    }
+                )
+            
+            metrics_collector.record_request(
+                method=method,
+                endpoint=path,
+                status_code=status_code,
+                duration_ms=duration_ms
+            )
+            
             # Clear request ID from context
             clear_request_id()
+
+
+def setup_middleware(app: FastAPI):
+    """
+    Configure all middleware for the application
+    """
     
-    # 2. Logging Middleware
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        """
-        Log all requests and responses
-        """
-        start_time = time.time()
-        
-        # Log request
-        logger.info(
-            "Request started",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "client": request.client.host if request.client else "unknown"
-            }
-        )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration_ms = (time.time() - start_time) * 1000
-        
-        # Log response
-        logger.info(
-            "Request completed",
-            extra={
-                "status_code": response.status_code,
-                "duration_ms": round(duration_ms, 2)
-            }
-        )
-        
-        # Record metrics
-        metrics_collector.record_request(
-            method=request.method,
-            endpoint=request.url.path,
-            status_code=response.status_code,
-            duration_ms=duration_ms
-        )
-        
-        return response
+    # 1. Request ID + Logging + Metrics (single pure ASGI middleware)
+    app.add_middleware(RequestContextMiddleware)
     
-    # 3. CORS Middleware
+    # 2. CORS Middleware
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # Configure appropriately for production
@@ -98,7 +144,7 @@ def setup_middleware(app: FastAPI):
         allow_headers=["*"],
     )
     
-    # 4. Rate Limiting
+    # 3. Rate Limiting
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
     
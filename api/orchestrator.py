@@ -3,11 +3,20 @@ Orchestrator API Router
 Endpoints for plan creation and execution with approval
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator
 from pydantic import BaseModel, Field
+import asyncio
 import logging
+import os
 
+import orjson
+
+from api.dependencies import json_body, json_body_openapi
+from api.errors import HTTPErrorMap
 from models.requests import OrchestratorRequest
 from services.orchestrator import OrchestratorService
 
@@ -17,6 +26,55 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Plan executions fork git/CodeQL and call Gemini; cap how many run at once
+MAX_CONCURRENT_EXECUTIONS = os.cpu_count() or 1
+_execution_semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXECUTIONS)
+
+# Fixed NDJSON line sent when a streamed execution fails; encoded once
+_STREAM_ERROR_LINE = orjson.dumps(
+    {"type": "error", "detail": "Plan execution failed."},
+    option=orjson.OPT_APPEND_NEWLINE
+)
+
+_CREATE_PLAN_ERRORS = HTTPErrorMap(logger, "Plan creation failed", {
+    ValueError: (status.HTTP_400_BAD_REQUEST, "Validation error", "Invalid request: {error}"),
+})
+_EXECUTE_PLAN_ERRORS = HTTPErrorMap(logger, "Plan execution failed", {
+    FileNotFoundError: (
+        status.HTTP_404_NOT_FOUND,
+        "Plan not found",
+        "Plan '{plan_id}' not found. Please create a plan first."
+    ),
+    PermissionError: (
+        status.HTTP_403_FORBIDDEN,
+        "Invalid signature",
+        "Invalid approval signature. Signature verification failed."
+    ),
+})
+_GET_PLAN_ERRORS = HTTPErrorMap(logger, "Plan retrieval failed", {
+    FileNotFoundError: (status.HTTP_404_NOT_FOUND, "Plan not found", "Plan '{plan_id}' not found."),
+})
+
+
+@lru_cache(maxsize=1)
+def get_orchestrator_service() -> OrchestratorService:
+    """
+    Shared OrchestratorService instance (created on first use)
+    
+    Injected with Depends so tests can swap it via app.dependency_overrides.
+    """
+    return OrchestratorService()
+
+
+def _json_response(content: Dict[str, Any]) -> Response:
+    """
+    Serialize a plan/result dict with orjson in a single pass
+    
+    Skips jsonable_encoder + json.dumps, which walk large action_results
+    lists twice. orjson encodes datetimes and enums from model_dump() natively.
+    """
+    return Response(content=orjson.dumps(content), media_type="application/json")
+
 
 class ExecutePlanRequest(BaseModel):
     """Request model for plan execution"""
@@ -40,6 +98,7 @@ class ExecutePlanRequest(BaseModel):
     status_code=status.HTTP_200_OK,
     summary="Create analysis plan",
     description="Create an analysis plan WITHOUT executing any tools. Returns plan with actions list.",
+    openapi_extra=json_body_openapi(OrchestratorRequest),
     responses={
         200: {
             "description": "Plan created successfully (not executed)",
@@ -82,10 +141,12 @@ class ExecutePlanRequest(BaseModel):
         },
         400: {"description": "Invalid request parameters"},
         500: {"description": "Internal server error"}
-    },
-    tags=["Orchestrator"]
+    }
 )
-async def create_plan(request: OrchestratorRequest) -> Dict:
+async def create_plan(
+    request: OrchestratorRequest = Depends(json_body(OrchestratorRequest)),
+    service: OrchestratorService = Depends(get_orchestrator_service)
+) -> Response:
     """
     Create analysis plan WITHOUT executing tools
     
@@ -96,25 +157,15 @@ async def create_plan(request: OrchestratorRequest) -> Dict:
     **IMPORTANT**: This endpoint creates a plan but does NOT execute it.
     To execute, call POST /api/orchestrate/execute with approval signature.
     """
-    try:
-        logger.info(f"Creating plan for repo: {request.repo_id}")
-        service = OrchestratorService()
-        plan = service.create_analysis_plan(request)
-        logger.info(f"Plan created: {plan['plan_id']} (NOT executed)")
-        return plan
+    with _CREATE_PLAN_ERRORS():
+        logger.info("Creating plan for repo: %s", request.repo_id)
+        # Persisting the plan is blocking file I/O
+        plan, raw = await asyncio.to_thread(service.create_analysis_plan_json, request)
+        logger.info("Plan created: %s (NOT executed)", plan['plan_id'])
         
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid request: {str(e)}"
-        )
-    except Exception as e:
-        logger.error(f"Plan creation failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Plan creation failed. Please try again."
-        )
+        # Respond with the canonical bytes just stored (json.dumps(plan, sort_keys=True)),
+        # so clients can HMAC the body as-is instead of re-serializing the plan
+        return Response(content=raw, media_type="application/json")
 
 
 @router.post(
@@ -123,6 +174,7 @@ async def create_plan(request: OrchestratorRequest) -> Dict:
     status_code=status.HTTP_200_OK,
     summary="Execute approved plan",
     description="Execute a previously created plan with HMAC approval signature.",
+    openapi_extra=json_body_openapi(ExecutePlanRequest),
     responses={
         200: {
             "description": "Plan executed successfully",
@@ -154,10 +206,12 @@ async def create_plan(request: OrchestratorRequest) -> Dict:
         403: {"description": "Invalid approval signature"},
         404: {"description": "Plan not found"},
         500: {"description": "Internal server error"}
-    },
-    tags=["Orchestrator"]
+    }
 )
-async def execute_plan(request: ExecutePlanRequest) -> Dict:
+async def execute_plan(
+    request: ExecutePlanRequest = Depends(json_body(ExecutePlanRequest)),
+    service: OrchestratorService = Depends(get_orchestrator_service)
+) -> Response:
     """
     Execute an approved plan with HMAC signature verification
     
@@ -175,35 +229,90 @@ async def execute_plan(request: ExecutePlanRequest) -> Dict:
     
     **IMPORTANT**: Signature verification prevents unauthorized execution.
     """
-    try:
-        logger.info(f"Executing plan: {request.plan_id} approved by {request.approved_by}")
-        service = OrchestratorService()
-        result = service.execute_plan(
+    with _EXECUTE_PLAN_ERRORS(plan_id=request.plan_id):
+        logger.info("Executing plan: %s approved by %s", request.plan_id, request.approved_by)
+        async with _execution_semaphore:
+            # Actions call Gemini and CodeQL synchronously; keep them off the event loop
+            result = await asyncio.to_thread(
+                service.execute_plan,
+                request.plan_id,
+                request.approved_by,
+                request.approval_signature
+            )
+        logger.info("Plan executed: %s", request.plan_id)
+        return _json_response(result)
+
+
+async def _stream_execution(events: Iterator[Dict]) -> AsyncIterator[bytes]:
+    """
+    Encode execution events as NDJSON, holding an execution slot while they run
+    
+    The slot is taken here rather than in the handler, so a client that is
+    gone before the body starts never holds one. Threadpool calls are not
+    abandoned on cancellation: after a disconnect, the action in flight
+    finishes before the slot is released.
+    """
+    async with _execution_semaphore:
+        try:
+            # Each action runs in the threadpool; the event loop stays free
+            async for event in iterate_in_threadpool(events):
+                yield orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+        except Exception as e:
+            logger.error("Streamed plan execution failed: %s", e, exc_info=True)
+            yield _STREAM_ERROR_LINE
+
+
+@router.post(
+    "/orchestrate/execute/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Execute approved plan with streamed progress",
+    description="Execute a plan like /orchestrate/execute, streaming one NDJSON line per completed action.",
+    openapi_extra=json_body_openapi(ExecutePlanRequest),
+    responses={
+        200: {
+            "description": "NDJSON stream of action results followed by the completed plan",
+            "content": {
+                "application/x-ndjson": {
+                    "example": (
+                        '{"type":"action","step":1,"action":"ingest_repository","status":"completed","result":{"status":"completed"}}\n'
+                        '{"type":"completed","plan":{"plan_id":"plan_abc123456789","status":"completed"}}\n'
+                    )
+                }
+            }
+        },
+        403: {"description": "Invalid approval signature"},
+        404: {"description": "Plan not found"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def execute_plan_stream(
+    request: ExecutePlanRequest = Depends(json_body(ExecutePlanRequest)),
+    service: OrchestratorService = Depends(get_orchestrator_service)
+) -> StreamingResponse:
+    """
+    Execute an approved plan, streaming progress as NDJSON
+    
+    Takes the same body as POST /api/orchestrate/execute. The signature is
+    verified before streaming starts, so 403/404 are regular HTTP errors.
+    Each completed action is sent as soon as it finishes; the last line
+    carries the completed plan. Results are persisted with the plan, so a
+    client that disconnects can fetch them from GET /api/orchestrate/plan/{plan_id}.
+    """
+    with _EXECUTE_PLAN_ERRORS(plan_id=request.plan_id):
+        logger.info("Streaming execution of plan: %s approved by %s", request.plan_id, request.approved_by)
+        # Loading the plan and checking its signature is blocking file I/O
+        plan = await asyncio.to_thread(
+            service.load_approved_plan,
             request.plan_id,
             request.approved_by,
             request.approval_signature
         )
-        logger.info(f"Plan executed: {request.plan_id}")
-        return result
-        
-    except FileNotFoundError as e:
-        logger.error(f"Plan not found: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Plan '{request.plan_id}' not found. Please create a plan first."
-        )
-    except PermissionError as e:
-        logger.error(f"Invalid signature: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Invalid approval signature. Signature verification failed."
-        )
-    except Exception as e:
-        logger.error(f"Plan execution failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Plan execution failed. Please try again."
-        )
+    
+    # The execution slot is taken by _stream_execution once the body starts
+    return StreamingResponse(
+        _stream_execution(service.execute_plan_stream(plan)),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get(
@@ -215,10 +324,12 @@ async def execute_plan(request: ExecutePlanRequest) -> Dict:
     responses={
         200: {"description": "Plan details retrieved"},
         404: {"description": "Plan not found"}
-    },
-    tags=["Orchestrator"]
+    }
 )
-async def get_plan(plan_id: str) -> Dict:
+async def get_plan(
+    plan_id: str,
+    service: OrchestratorService = Depends(get_orchestrator_service)
+) -> Response:
     """
     Get details of a created plan
     
@@ -226,25 +337,12 @@ async def get_plan(plan_id: str) -> Dict:
     
     Returns plan details including status and actions.
     """
-    try:
-        logger.info(f"Retrieving plan: {plan_id}")
-        service = OrchestratorService()
-        plan = service._load_plan(plan_id)
+    with _GET_PLAN_ERRORS(plan_id=plan_id):
+        logger.info("Retrieving plan: %s", plan_id)
+        raw = service.get_plan_json(plan_id)
         
-        if not plan:
+        if raw is None:
             raise FileNotFoundError(f"Plan {plan_id} not found")
         
-        return plan
-        
-    except FileNotFoundError as e:
-        logger.error(f"Plan not found: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Plan '{plan_id}' not found."
-        )
-    except Exception as e:
-        logger.error(f"Plan retrieval failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Plan retrieval failed. Please try again."
-        )
+        # The stored file is already JSON; send it as-is
+        return Response(content=raw, media_type="application/json")
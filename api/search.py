@@ -3,10 +3,17 @@ Search API Router
 Endpoints for semantic code search
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import Response
+from functools import lru_cache
 from typing import Dict
+import asyncio
 import logging
 
+import orjson
+
+from api.dependencies import json_body, json_body_openapi
+from api.errors import HTTPErrorMap
 from models.requests import SemanticSearchRequest
 from models.responses import SemanticSearchResponse
 from services.search_service import SearchService
@@ -17,6 +24,63 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+_SEARCH_ERRORS = HTTPErrorMap(logger, "Search failed", {
+    ValueError: (status.HTTP_400_BAD_REQUEST, "Validation error", "Invalid request: {error}"),
+    FileNotFoundError: (
+        status.HTTP_404_NOT_FOUND,
+        "Repository not found",
+        "Repository '{repo_id}' not found. Please ingest and index it first."
+    ),
+    RuntimeError: (
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        "Search failed",
+        "Search service error. Please ensure SeaGOAT is installed and the repository is indexed."
+    ),
+})
+_INDEX_ERRORS = HTTPErrorMap(logger, "Indexing failed", {
+    FileNotFoundError: (
+        status.HTTP_404_NOT_FOUND,
+        "Repository not found",
+        "Repository '{repo_id}' not found. Please ingest it first."
+    ),
+    RuntimeError: (
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        "Indexing failed",
+        "Indexing service error. Please ensure SeaGOAT is installed."
+    ),
+})
+
+
+@lru_cache(maxsize=1)
+def get_search_service() -> SearchService:
+    """
+    Shared SearchService instance (created on first use)
+    
+    Injected with Depends so tests can swap it via app.dependency_overrides.
+    """
+    return SearchService()
+
+
+# Indexing jobs in flight, by repo_id; concurrent requests share one job
+_inflight_index: Dict[str, "asyncio.Future[Dict]"] = {}
+
+
+async def _index_once(service: SearchService, repo_id: str) -> Dict:
+    """
+    Index a repository in the threadpool, coalescing concurrent calls
+    
+    A second request for a repo that is already being indexed awaits the
+    running job instead of starting another SeaGOAT process.
+    """
+    job = _inflight_index.get(repo_id)
+    if job is None:
+        job = asyncio.ensure_future(asyncio.to_thread(service.index_repository, repo_id))
+        _inflight_index[repo_id] = job
+        job.add_done_callback(lambda _: _inflight_index.pop(repo_id, None))
+    
+    # Shield so one client disconnecting doesn't cancel the shared job
+    return await asyncio.shield(job)
+
 
 @router.post(
     "/search/semantic",
@@ -24,6 +88,7 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
     summary="Semantic code search",
     description="Search code semantically using SeaGOAT. Returns relevant code snippets with context.",
+    openapi_extra=json_body_openapi(SemanticSearchRequest),
     responses={
         200: {
             "description": "Search completed successfully",
@@ -49,10 +114,12 @@ router = APIRouter()
         400: {"description": "Invalid request parameters"},
         404: {"description": "Repository not found or not indexed"},
         500: {"description": "Internal server error"}
-    },
-    tags=["Search"]
+    }
 )
-async def semantic_search(request: SemanticSearchRequest) -> SemanticSearchResponse:
+async def semantic_search(
+    request: SemanticSearchRequest = Depends(json_body(SemanticSearchRequest)),
+    service: SearchService = Depends(get_search_service)
+) -> Response:
     """
     Perform semantic code search on an ingested repository
     
@@ -62,37 +129,15 @@ async def semantic_search(request: SemanticSearchRequest) -> SemanticSearchRespo
     
     Returns relevant code snippets with relevance scores.
     """
-    try:
-        logger.info(f"Searching repo {request.repo_id} for: {request.query}")
-        service = SearchService()
-        response = service.search(request)
-        logger.info(f"Search completed: {response.total_results} results")
-        return response
+    with _SEARCH_ERRORS(repo_id=request.repo_id):
+        logger.info("Searching repo %s for: %s", request.repo_id, request.query)
+        # SeaGOAT runs as a subprocess; keep it off the event loop
+        response = await asyncio.to_thread(service.search, request)
+        logger.info("Search completed: %s results", response.total_results)
         
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid request: {str(e)}"
-        )
-    except FileNotFoundError as e:
-        logger.error(f"Repository not found: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Repository '{request.repo_id}' not found. Please ingest and index it first."
-        )
-    except RuntimeError as e:
-        logger.error(f"Search failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Search service error. Please ensure SeaGOAT is installed and the repository is indexed."
-        )
-    except Exception as e:
-        logger.error(f"Search failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Search failed. Please try again."
-        )
+        # Built with model_construct by the service: serialize it once in
+        # pydantic-core instead of re-validating it against response_model
+        return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 @router.post(
@@ -118,10 +163,12 @@ async def semantic_search(request: SemanticSearchRequest) -> SemanticSearchRespo
         },
         404: {"description": "Repository not found"},
         500: {"description": "Internal server error"}
-    },
-    tags=["Search"]
+    }
 )
-async def index_repository(repo_id: str) -> Dict:
+async def index_repository(
+    repo_id: str,
+    service: SearchService = Depends(get_search_service)
+) -> Response:
     """
     Index a repository for semantic search
     
@@ -129,28 +176,8 @@ async def index_repository(repo_id: str) -> Dict:
     
     Returns indexing metadata including document count and time taken.
     """
-    try:
-        logger.info(f"Indexing repository: {repo_id}")
-        service = SearchService()
-        result = service.index_repository(repo_id)
-        logger.info(f"Indexing completed for repo: {repo_id}")
-        return result
-        
-    except FileNotFoundError as e:
-        logger.error(f"Repository not found: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Repository '{repo_id}' not found. Please ingest it first."
-        )
-    except RuntimeError as e:
-        logger.error(f"Indexing failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Indexing service error. Please ensure SeaGOAT is installed."
-        )
-    except Exception as e:
-        logger.error(f"Indexing failed: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Indexing failed. Please try again."
-        )
+    with _INDEX_ERRORS(repo_id=repo_id):
+        logger.info("Indexing repository: %s", repo_id)
+        result = await _index_once(service, repo_id)
+        logger.info("Indexing completed for repo: %s", repo_id)
+        return Response(content=orjson.dumps(result), media_type="application/json")
@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 from pydantic import Field
 from typing import Optional
 import os
+import threading
 from pathlib import Path
 
 
@@ -13,6 +14,15 @@ class Settings(BaseSettings):
     API_VERSION: str = "1.0.0"
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
+    API_WORKERS: int = Field(
+        default=1,
+        ge=1,
+        description="Uvicorn worker processes when started via `python main.py`"
+    )
+    API_LIMIT_CONCURRENCY: Optional[int] = Field(
+        default=None,
+        description="Per-worker cap on concurrent connections (503 beyond it); None = unlimited"
+    )
     
     # Gemini Configuration
     GEMINI_API_KEY: Optional[str] = None
@@ -30,6 +40,14 @@ class Settings(BaseSettings):
         description="Path to CodeQL CLI executable"
     )
     CODEQL_DB_DIR: str = "./workspace/codeql-dbs"
+    CODEQL_USE_CLI_SERVER: bool = Field(
+        default=True,
+        description="Run CodeQL commands through long-lived cli-server processes"
+    )
+    CODEQL_KEEP_DATABASES: bool = Field(
+        default=False,
+        description="Keep CodeQL databases and SARIF files after a scan (for debugging)"
+    )
     
     # Orchestrator configuration
     ORCHESTRATOR_SECRET_KEY: str = Field(
@@ -67,19 +85,36 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
-def ensure_directories():
-    """Create all required workspace directories"""
-    directories = [
-        settings.WORKSPACE_DIR,
-        settings.INGEST_DIR,
-        settings.OUTPUT_DIR,
-        settings.MEMORY_DIR,
-        settings.CODEQL_DB_DIR,
-    ]
-    
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
+_directories_ready = False
+_directories_lock = threading.Lock()
 
 
-# Create directories on module import
-ensure_directories()
+def ensure_directories():
+    """
+    Create all required workspace directories (once per process)
+    
+    Called at app startup rather than on import; services that write to a
+    directory still create it themselves. Existing directories are skipped
+    without a mkdir call.
+    """
+    global _directories_ready
+    if _directories_ready:
+        return
+    
+    with _directories_lock:
+        if _directories_ready:
+            return
+        
+        directories = [
+            settings.WORKSPACE_DIR,
+            settings.INGEST_DIR,
+            settings.OUTPUT_DIR,
+            settings.MEMORY_DIR,
+            settings.CODEQL_DB_DIR,
+        ]
+        
+        for directory in directories:
+            if not os.path.isdir(directory):
+                Path(directory).mkdir(parents=True, exist_ok=True)
+        
+        _directories_ready = True
@@ -2,14 +2,18 @@
 Repo Analyzer API - Main FastAPI Application
 """
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, FastAPI
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from typing import Any, Dict, Optional
 import logging
 
+import orjson
+
 from api import ingest, search, analysis, orchestrator
 from api.middleware import setup_middleware
 from utils.metrics import metrics_collector
-from config import settings
+from config import ensure_directories, settings
 
 # Setup logging
 logging.basicConfig(
@@ -41,76 +45,112 @@ app = FastAPI(
     Default: 100 requests per minute per IP address.
     """,
     version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    # Docs routes are registered below so the schema is served as cached bytes
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None
 )
 
+OPENAPI_URL = "/openapi.json"
+_openapi_bytes: Optional[bytes] = None  # Encoded schema, built once per process
+
 # Setup middleware (CORS, rate limiting, etc.)
 setup_middleware(app)
 
-# Include routers
-app.include_router(ingest.router, prefix="/api", tags=["Ingest"])
-app.include_router(search.router, prefix="/api", tags=["Search"])
-app.include_router(analysis.router, prefix="/api", tags=["Analysis"])
-app.include_router(orchestrator.router, prefix="/api", tags=["Orchestrator"])
+# Include routers (each exactly once, all under a single /api parent)
+api_router = APIRouter(prefix="/api")
+api_router.include_router(ingest.router, tags=["Ingest"])
+api_router.include_router(search.router, tags=["Search"])
+api_router.include_router(analysis.router, tags=["Analysis"])
+api_router.include_router(orchestrator.router, tags=["Orchestrator"])
+app.include_router(api_router)
 
 logger.info("All routers registered successfully")
 
 
+def openapi_bytes() -> bytes:
+    """
+    OpenAPI schema encoded once with orjson
+    
+    FastAPI caches the schema dict but re-encodes it with json.dumps on every
+    GET /openapi.json; the routes are fixed after import, so the bytes are too.
+    """
+    global _openapi_bytes
+    if _openapi_bytes is None:
+        _openapi_bytes = orjson.dumps(app.openapi())
+    return _openapi_bytes
+
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_json() -> Response:
+    """
+    OpenAPI schema (pre-encoded)
+    """
+    return Response(content=openapi_bytes(), media_type="application/json")
+
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui() -> HTMLResponse:
+    """
+    Swagger UI
+    """
+    return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{app.title} - Swagger UI")
+
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc() -> HTMLResponse:
+    """
+    ReDoc
+    """
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+
+# API info never changes at runtime; encode it once
+_ROOT_BYTES = orjson.dumps({
+    "name": "Repo Analyzer API",
+    "version": "1.0.0",
+    "status": "operational",
+    "docs": "/docs",
+    "redoc": "/redoc",
+    "openapi": OPENAPI_URL,
+    "health": "/health",
+    "metrics": "/metrics"
+})
+
+
 @app.get(
     "/",
     summary="Root endpoint",
     description="Returns API information",
     tags=["Info"]
 )
-async def root():
+async def root() -> Response:
     """
     Root endpoint - Returns API information
     """
-    return {
-        "name": "Repo Analyzer API",
-        "version": "1.0.0",
-        "status": "operational",
-        "docs": "/docs",
-        "redoc": "/redoc",
-        "openapi": "/openapi.json",
-        "health": "/health",
-        "metrics": "/metrics"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
-from services.codeql_service import CodeQLService
-from services.gemini_service import GeminiService
+from services.gemini_service import get_gemini_service
 
 # Initialize services at module level for health checks
-codeql_service = CodeQLService()
-gemini_service = GeminiService()
+# (CodeQL reuses the analysis router's instance: one version probe, one CLI server;
+#  Gemini shares the orchestrator's client and startup verification)
+codeql_service = analysis.codeql_service
+gemini_service = get_gemini_service()
 
-@app.get(
-    "/health",
-    summary="Health check",
-    description="Returns API health status with service availability",
-    tags=["Info"]
-)
-async def health():
-    """
-    Health check endpoint with CodeQL and Gemini status
+
+def _service_status() -> Dict[str, Any]:
     """
-    from datetime import datetime
+    CodeQL/Gemini availability for /health
     
-    # Calculate uptime
-    uptime_seconds = (datetime.utcnow() - metrics_collector.start_time).total_seconds()
-    
-    # Get statuses
+    Read on every request: get_status() only returns attributes, so a
+    refresh_availability() shows up on the next poll.
+    """
     codeql_status = codeql_service.get_status()
     gemini_status = gemini_service.get_status()
     
     return {
-        "status": "healthy",
-        "version": "1.0.0",
-        "debug_mode": settings.DEBUG,
-        "uptime_seconds": round(uptime_seconds, 2),
         "codeql_available": codeql_status["codeql_available"],
         "codeql_version": codeql_status["codeql_version"],
         "gemini_available": gemini_status["gemini_available"],
@@ -126,13 +166,38 @@ async def health():
     }
 
 
+@app.get(
+    "/health",
+    summary="Health check",
+    description="Returns API health status with service availability",
+    tags=["Info"]
+)
+async def health() -> Response:
+    """
+    Health check endpoint with CodeQL and Gemini status
+    """
+    from datetime import datetime
+    
+    # Calculate uptime
+    uptime_seconds = (datetime.utcnow() - metrics_collector.start_time).total_seconds()
+    
+    # Polled constantly by probes; encode with orjson, skipping jsonable_encoder
+    return Response(content=orjson.dumps({
+        "status": "healthy",
+        "version": "1.0.0",
+        "debug_mode": settings.DEBUG,
+        "uptime_seconds": round(uptime_seconds, 2),
+        **_service_status()
+    }), media_type="application/json")
+
+
 @app.get(
     "/metrics",
     summary="API metrics",
     description="Returns request metrics and statistics",
     tags=["Info"]
 )
-async def metrics():
+async def metrics() -> Response:
     """
     Metrics endpoint
     
@@ -144,10 +209,10 @@ async def metrics():
     """
     from datetime import datetime
     
-    return {
+    return Response(content=orjson.dumps({
         "metrics": metrics_collector.get_metrics(),
         "timestamp": datetime.utcnow().isoformat() + "Z"
-    }
+    }), media_type="application/json")
 
 
 @app.on_event("startup")
@@ -161,6 +226,11 @@ async def startup_event():
     logger.info("Version: 1.0.0")
     logger.info("Docs: http://localhost:8000/docs")
     logger.info("=" * 80)
+    
+    ensure_directories()
+    
+    # Build the schema now rather than on the first docs request
+    openapi_bytes()
 
 
 @app.on_event("shutdown")
@@ -169,8 +239,23 @@ async def shutdown_event():
     Shutdown event handler
     """
     logger.info("Repo Analyzer API Shutting down...")
+    
+    # Stop the long-lived CodeQL CLI server process
+    codeql_service.close()
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+    
+    # Import string (not the app object) so uvicorn can spawn API_WORKERS
+    # processes; loop/http "auto" pick uvloop and httptools from uvicorn[standard]
+    uvicorn.run(
+        "main:app",
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        workers=settings.API_WORKERS,
+        loop="auto",
+        http="auto",
+        limit_concurrency=settings.API_LIMIT_CONCURRENCY,
+        log_level="info"
+    )
@@ -1,23 +1,39 @@
-import requests
-import json
+import httpx
+import orjson
 import hmac
 import hashlib
 import sys
 import time
 from pathlib import Path
 
+from config import settings
+
 # Configuration
 API_URL = "http://localhost:8000"
-SECRET_KEY = "dev-secret-key-change-in-production-use-strong-random-key"  # Matches config.py default
+SECRET_KEY = settings.ORCHESTRATOR_SECRET_KEY  # Same key the server verifies with (.env / environment)
+REQUEST_TIMEOUT = 600  # Ingest and plan execution can take minutes
+COMPLETED_EVENT_PREFIX = '{"type":"completed"'  # Last line of the execute stream (orjson, no spaces)
+
+# HMAC keyed once; each signature copies it instead of re-deriving the key pads
+_HMAC_TEMPLATE = hmac.new(SECRET_KEY.encode(), digestmod=hashlib.sha256)
+
+# One pooled keep-alive client for the session (no TCP setup per request)
+client = httpx.Client(
+    base_url=API_URL,
+    timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+    limits=httpx.Limits(max_connections=2, max_keepalive_connections=2)
+)
+
+_RULE = "=" * 50
+_HEADER_TEMPLATE = f"\n{_RULE}\n %s\n{_RULE}\n\n"  # Rule lines built once
 
 def print_header(text):
-    print(f"\n{'='*50}")
-    print(f" {text}")
-    print(f"{'='*50}\n")
+    # One write instead of three print() calls
+    sys.stdout.write(_HEADER_TEMPLATE % text)
 
 def check_health():
     try:
-        resp = requests.get(f"{API_URL}/health")
+        resp = client.get("/health")
         if resp.status_code == 200:
             print("✅ API is Healthy")
             data = resp.json()
@@ -48,11 +64,11 @@ def ingest_repo():
     }
     
     print(f"Sending Ingest Request for {repo_id}...")
-    resp = requests.post(f"{API_URL}/api/ingest", json=payload)
+    resp = client.post("/api/ingest", json=payload)
     
     if resp.status_code == 200:
         print("✅ Ingest Success!")
-        print(json.dumps(resp.json(), indent=2))
+        print(orjson.dumps(orjson.loads(resp.content), option=orjson.OPT_INDENT_2).decode())
         return repo_id
     else:
         print(f"❌ Ingest Failed: {resp.text}")
@@ -76,7 +92,7 @@ def run_deep_analysis(repo_id):
         "custom_instructions": query
     }
     
-    resp = requests.post(f"{API_URL}/api/orchestrate/plan", json=plan_payload)
+    resp = client.post("/api/orchestrate/plan", json=plan_payload)
     if resp.status_code != 200:
         print(f"❌ Plan Creation Failed: {resp.text}")
         return
@@ -91,25 +107,14 @@ def run_deep_analysis(repo_id):
     approved_by = "admin"
     
     # Calculate HMAC
-    # Signature = HMAC(plan_json + approved_by, secret_key)
-    # Note: We need the EXACT JSON that server uses. 
-    # In a real app, the server gives us the payload to sign, or we sign the ID.
-    # Our Orchestrator expects HMAC(plan_json_string + ":admin", key).
-    # Since we can't easily reproduce the exact JSON string formatting of Python's json.dumps on the server side 
-    # without risk of whitespace mismatch, the Orchestrator verification is strict.
-    # However, meant for manual verification.
-    
-    # WAIT: The orchestrator's `_verify_signature` does `json.dumps(plan, sort_keys=True)`.
-    # We can replicate that here.
-    
-    # We must use the plan data returned from the server, but ensure we don't modify it.
-    plan_json_str = json.dumps(plan_data, sort_keys=True)
-    message = f"{plan_json_str}:{approved_by}"
-    signature = hmac.new(
-        SECRET_KEY.encode(),
-        message.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    # Signature = HMAC(plan_json + ":" + approved_by, secret_key), where plan_json is
+    # json.dumps(plan, sort_keys=True). The plan endpoint responds with exactly those
+    # bytes, so sign the raw body: no re-serialization, no whitespace mismatch.
+    mac = _HMAC_TEMPLATE.copy()
+    mac.update(resp.content)
+    mac.update(b":")
+    mac.update(approved_by.encode())
+    signature = mac.hexdigest()
     
     print(f"   Signature: {signature[:8]}...")
     
@@ -121,28 +126,39 @@ def run_deep_analysis(repo_id):
         "approval_signature": signature
     }
     
+    # Stream progress as NDJSON (one line per finished action) instead of
+    # buffering the whole executed plan; the final "completed" line repeats
+    # every result, so it is not parsed
     start_time = time.time()
-    resp = requests.post(f"{API_URL}/api/orchestrate/execute", json=exec_payload)
-    duration = time.time() - start_time
-    
-    if resp.status_code == 200:
-        print(f"✅ Execution Complete ({duration:.1f}s)!")
-        result_data = resp.json()
-        print("\n--- ANALYSIS RESULTS ---")
+    with client.stream("POST", "/api/orchestrate/execute/stream", json=exec_payload) as resp:
+        if resp.status_code != 200:
+            print(f"❌ Execution Failed: {resp.read().decode()}")
+            return
         
-        # Extract Gemini Results
-        results_list = result_data.get("results", {}).get("action_results", [])
-        for action in results_list:
-            if action["action"] == "gemini_analyze":
+        print("\n--- ANALYSIS RESULTS ---")
+        for line in resp.iter_lines():
+            if not line or line.startswith(COMPLETED_EVENT_PREFIX):
+                continue
+            
+            event = orjson.loads(line)
+            if event["type"] == "error":
+                print(f"❌ Execution Failed: {event['detail']}")
+                return
+            
+            print(f"   Step {event['step']}: {event['action']} -> {event['status']}")
+            
+            # Extract Gemini Results
+            if event["action"] == "gemini_analyze":
                 print("\n👀 GEMINI FINDINGS:")
-                analysis = action.get("result", {}).get("analysis", {})
+                analysis = event.get("result", {}).get("analysis", {})
                 print(f"Summary: {analysis.get('summary')}")
                 print("\nFindings:")
                 for finding in analysis.get("findings", []):
                     print(f" - {finding}")
                 print(f"\nConfidence: {analysis.get('confidence_score')}")
-    else:
-        print(f"❌ Execution Failed: {resp.text}")
+    
+    duration = time.time() - start_time
+    print(f"\n✅ Execution Complete ({duration:.1f}s)!")
 
 def main():
     print_header("Repo Analyzer - Manual Test Kit")
@@ -175,4 +191,7 @@ def main():
             print("Invalid option")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        client.close()
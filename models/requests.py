@@ -3,17 +3,24 @@ Request models for Repo Analyzer API
 All models include JSON Schema examples and Field constraints
 """
 
-from pydantic import BaseModel, Field, HttpUrl, field_validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from enum import Enum
 
+HTTP_URL_PATTERN = r"^https?://[^\s/$.?#][^\s]*$"  # Scheme + non-empty host, no whitespace
+
 
 class RepoSource(BaseModel):
     """Repository source specification"""
-    url: Optional[HttpUrl] = Field(
+    url: Optional[str] = Field(
         None,
         description="Git repository URL (GitHub, GitLab, etc.)",
-        examples=["https://github.com/user/repo"]
+        examples=["https://github.com/user/repo"],
+        # Matched by pydantic-core's linear-time regex engine; the URL is only
+        # handed to git clone, so a full HttpUrl parse is not needed
+        pattern=HTTP_URL_PATTERN,
+        max_length=2083,
+        json_schema_extra={"format": "uri"}
     )
     local_path: Optional[str] = Field(
         None,
@@ -21,6 +28,17 @@ class RepoSource(BaseModel):
         examples=["/path/to/local/repo", "C:\\repos\\myproject"]
     )
     
+    @field_validator('url', mode='before')
+    @classmethod
+    def normalize_url(cls, v):
+        """Trim surrounding whitespace and lowercase the scheme, as HttpUrl did"""
+        if isinstance(v, str):
+            v = v.strip()
+            scheme, sep, rest = v.partition("://")
+            if sep and scheme.lower() in ("http", "https"):
+                v = f"{scheme.lower()}{sep}{rest}"
+        return v
+    
     @field_validator('url', 'local_path')
     @classmethod
     def check_at_least_one_source(cls, v, info):
@@ -128,6 +146,12 @@ class CodeQLScanRequest(BaseModel):
         description="CodeQL query suite to run",
         examples=["security-extended", "security-and-quality", "code-scanning"]
     )
+    max_findings: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Return at most this many findings (counts cover all findings; the response sets truncated)",
+        examples=[500]
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -8,6 +8,15 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from enum import Enum
 
+# Shared by SearchResult and the results list of SemanticSearchResponse
+SEARCH_RESULT_EXAMPLE = {
+    "file_path": "src/auth/login.py",
+    "line_number": 42,
+    "code_snippet": "def authenticate_user(username: str, password: str):",
+    "relevance_score": 0.95,
+    "context": "Authentication module"
+}
+
 
 class IngestResponse(BaseModel):
     """Response from ingest operation"""
@@ -104,15 +113,7 @@ class SearchResult(BaseModel):
     
     model_config = {
         "json_schema_extra": {
-            "examples": [
-                {
-                    "file_path": "src/auth/login.py",
-                    "line_number": 42,
-                    "code_snippet": "def authenticate_user(username: str, password: str):",
-                    "relevance_score": 0.95,
-                    "context": "Authentication module"
-                }
-            ]
+            "examples": [SEARCH_RESULT_EXAMPLE]
         }
     }
 
@@ -146,15 +147,7 @@ class SemanticSearchResponse(BaseModel):
                 {
                     "repo_id": "a1b2c3d4",
                     "query": "authentication logic",
-                    "results": [
-                        {
-                            "file_path": "src/auth/login.py",
-                            "line_number": 42,
-                            "code_snippet": "def authenticate_user(username: str, password: str):",
-                            "relevance_score": 0.95,
-                            "context": "Authentication module"
-                        }
-                    ],
+                    "results": [SEARCH_RESULT_EXAMPLE],
                     "total_results": 1
                 }
             ]
@@ -170,6 +163,14 @@ class SeverityEnum(str, Enum):
     LOW = "low"
 
 
+# Members as module globals: per-finding code reads these without a class
+# attribute lookup and can compare with `is`
+CRITICAL = SeverityEnum.CRITICAL
+HIGH = SeverityEnum.HIGH
+MEDIUM = SeverityEnum.MEDIUM
+LOW = SeverityEnum.LOW
+
+
 class CodeQLFinding(BaseModel):
     """Single CodeQL finding"""
     rule_id: str = Field(
@@ -272,6 +273,11 @@ class CodeQLResponse(BaseModel):
         description="Number of low severity findings",
         examples=[2]
     )
+    truncated: bool = Field(
+        default=False,
+        description="True if max_findings left findings out of the list (counts still cover all of them)",
+        examples=[False]
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -284,7 +290,8 @@ class CodeQLResponse(BaseModel):
                     "critical_count": 2,
                     "high_count": 5,
                     "medium_count": 6,
-                    "low_count": 2
+                    "low_count": 2,
+                    "truncated": False
                 }
             ]
         }
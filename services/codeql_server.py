@@ -0,0 +1,207 @@
+"""
+CodeQL CLI Server - Long-lived `codeql execute cli-server` process
+Avoids paying JVM startup for every CodeQL command
+"""
+
+import json
+import queue
+import subprocess
+import threading
+from typing import List, Optional
+
+
+# Protocol framing (same as the vscode-codeql extension):
+# each command is a JSON array of arguments followed by a NUL byte; the server
+# ends stdout with NUL on success, or ends stderr with 0x01 on failure.
+COMMAND_TERMINATOR = b"\x00"
+SUCCESS_MARKER = 0
+FAILURE_MARKER = 1
+SHUTDOWN_TIMEOUT = 5  # seconds to wait for a graceful shutdown
+SHUTDOWN_COMMAND = json.dumps(["shutdown"]).encode("utf-8") + COMMAND_TERMINATOR
+
+
+class CodeQLCLIServer:
+    """
+    Wrapper around a single `codeql execute cli-server` process.
+
+    The server handles one command at a time, so calls are serialized with a
+    lock. The process is started lazily and restarted if it has exited.
+    """
+
+    def __init__(self, codeql_path: str):
+        self.codeql_path = codeql_path
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+        # Per-command state shared with the reader threads
+        self._stdout_chunks: List[bytes] = []
+        self._stderr_chunks: List[bytes] = []
+        self._done = threading.Event()
+        self._failed = False
+
+    def is_running(self) -> bool:
+        """Check whether the server process is alive"""
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self) -> None:
+        """
+        Start the server process and its output reader threads.
+
+        Raises:
+            OSError: If the CodeQL binary cannot be executed
+        """
+        self._process = subprocess.Popen(
+            [self.codeql_path, "execute", "cli-server"],  # NO shell=True!
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+
+        process = self._process
+        for stream, chunks, marker in (
+            (process.stdout, self._stdout_chunks, SUCCESS_MARKER),
+            (process.stderr, self._stderr_chunks, FAILURE_MARKER),
+        ):
+            threading.Thread(
+                target=self._read_stream,
+                args=(process, stream, chunks, marker),
+                daemon=True
+            ).start()
+
+    def _read_stream(
+        self,
+        process: subprocess.Popen,
+        stream,
+        chunks: List[bytes],
+        marker: int
+    ) -> None:
+        """Collect output and flag completion when the end-of-command marker arrives"""
+        while True:
+            data = stream.read1(65536)
+            if process is not self._process:
+                # Server was replaced; this reader belongs to a dead process
+                return
+            if not data:
+                # Process exited; wake any waiting caller
+                self._failed = True
+                self._done.set()
+                return
+
+            chunks.append(data)
+            # Nothing is written after the marker until the next command starts
+            if data[-1] == marker:
+                self._failed = marker == FAILURE_MARKER
+                self._done.set()
+
+    def run(self, args: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """
+        Run a CodeQL command (without the leading binary path) on the server.
+
+        Args:
+            args: CodeQL arguments, e.g. ["database", "create", ...]
+            timeout: Seconds to wait for the command to finish
+
+        Returns:
+            CompletedProcess mirroring what subprocess.run would return
+
+        Raises:
+            OSError: If the server cannot be started
+            subprocess.TimeoutExpired: If the command exceeds the timeout
+        """
+        with self._lock:
+            if not self.is_running():
+                self._start()
+
+            self._stdout_chunks.clear()
+            self._stderr_chunks.clear()
+            self._done.clear()
+            self._failed = False
+
+            self._process.stdin.write(json.dumps(args).encode("utf-8") + COMMAND_TERMINATOR)
+            self._process.stdin.flush()
+
+            if not self._done.wait(timeout):
+                # The server is stuck on this command; discard it
+                self._kill()
+                raise subprocess.TimeoutExpired([self.codeql_path] + args, timeout)
+
+            stdout = b"".join(self._stdout_chunks).rstrip(b"\x00")
+            stderr = b"".join(self._stderr_chunks).rstrip(b"\x01")
+
+            return subprocess.CompletedProcess(
+                args=[self.codeql_path] + args,
+                returncode=1 if self._failed else 0,
+                stdout=stdout.decode("utf-8", errors="replace"),
+                stderr=stderr.decode("utf-8", errors="replace")
+            )
+
+    def _kill(self) -> None:
+        """Forcefully stop the server process"""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def shutdown(self) -> None:
+        """Ask the server to exit, killing it if it does not stop in time"""
+        with self._lock:
+            if not self.is_running():
+                self._process = None
+                return
+
+            try:
+                self._process.stdin.write(SHUTDOWN_COMMAND)
+                self._process.stdin.flush()
+                self._process.wait(timeout=SHUTDOWN_TIMEOUT)
+                self._process = None
+            except (OSError, subprocess.TimeoutExpired):
+                self._kill()
+
+
+class CodeQLCLIServerPool:
+    """
+    Fixed set of CLI servers so concurrent analyses don't queue on one process.
+
+    Each server runs one command at a time, and `database create` can hold it
+    for minutes. A command is handed to an idle server; the most recently
+    used one is preferred, so extra servers only start under real
+    concurrency. Exposes the same run/is_running/shutdown API as
+    CodeQLCLIServer.
+    """
+
+    def __init__(self, codeql_path: str, size: int):
+        self.codeql_path = codeql_path
+        self._servers = [CodeQLCLIServer(codeql_path) for _ in range(size)]
+        self._idle: "queue.LifoQueue[CodeQLCLIServer]" = queue.LifoQueue()
+        for server in reversed(self._servers):
+            self._idle.put(server)
+
+    def is_running(self) -> bool:
+        """Check whether any server process is alive"""
+        return any(server.is_running() for server in self._servers)
+
+    def run(self, args: List[str], timeout: float) -> subprocess.CompletedProcess:
+        """
+        Run a CodeQL command on an idle server, waiting for one if all are busy.
+
+        Args:
+            args: CodeQL arguments, e.g. ["database", "create", ...]
+            timeout: Seconds to wait for the command to finish
+
+        Returns:
+            CompletedProcess mirroring what subprocess.run would return
+
+        Raises:
+            OSError: If the server cannot be started
+            subprocess.TimeoutExpired: If the command exceeds the timeout
+        """
+        server = self._idle.get()
+        try:
+            return server.run(args, timeout)
+        finally:
+            self._idle.put(server)
+
+    def shutdown(self) -> None:
+        """Shut down every server process"""
+        for server in self._servers:
+            server.shutdown()
@@ -3,59 +3,128 @@ CodeQL Service - Static analysis using CodeQL with SARIF parsing
 Implements database creation, analysis, and SARIF JSON parsing
 """
 
+import asyncio
+import hashlib
+import os
+import re
 import subprocess
-import json
 import shutil
+import uuid
+from collections import Counter
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 
+import orjson
+
 from config import settings
 from models.requests import CodeQLScanRequest
-from models.responses import CodeQLResponse, CodeQLFinding, SeverityEnum
+from models.responses import CodeQLResponse, CodeQLFinding, SeverityEnum, CRITICAL, HIGH, MEDIUM, LOW
+from services.codeql_server import CodeQLCLIServerPool
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
 
 
 # Constants for safety guardrails
 DB_CREATE_TIMEOUT = 600  # 10 minutes for database creation
 ANALYZE_TIMEOUT = 600  # 10 minutes for analysis
 VERSION_CHECK_TIMEOUT = 10  # 10 seconds for version check
+MAX_ERROR_OUTPUT_CHARS = 4000  # Tail of CodeQL stderr kept in error messages
+MAX_CONCURRENT_ANALYSES = 2  # Cap concurrent CodeQL runs (each is memory-heavy)
+# CodeQL defaults to one thread; split the cores between concurrent runs
+CODEQL_THREADS = max(1, (os.cpu_count() or 1) // MAX_CONCURRENT_ANALYSES)
+
+RESULT_CACHE_SIZE = 32  # In-memory entries kept in front of the disk cache
+
+# Module 2.3: Whitelisted query suites
+ALLOWED_QUERY_SUITES = frozenset({
+    "security-extended",
+    "security-and-quality",
+    "security",
+    "code-scanning"
+})
+ALLOWED_QUERY_SUITES_TEXT = ", ".join(sorted(ALLOWED_QUERY_SUITES))
+
+# Phase 1 repo IDs: 8-character lowercase hex (from a UUID)
+REPO_ID_RE = re.compile(r'[a-f0-9]{8}')
 
-# Explicit SARIF severity mapping
 # Explicit SARIF severity mapping
 SARIF_SEVERITY_MAP = {
-    "error": SeverityEnum.CRITICAL,
-    "warning": SeverityEnum.HIGH,
-    "note": SeverityEnum.MEDIUM,
-    "none": SeverityEnum.LOW
+    "error": CRITICAL,
+    "warning": HIGH,
+    "note": MEDIUM,
+    "none": LOW
 }
 
+# Recommendation for rules without help or description text
+DEFAULT_RECOMMENDATION = "Review and fix the identified issue"
+
+_finding_severity = attrgetter("severity")
+
+# Errors raised for malformed SARIF by whichever parser is in use
+SARIF_DECODE_ERRORS = (orjson.JSONDecodeError, ijson.JSONError) if IJSON_AVAILABLE else (orjson.JSONDecodeError,)
+
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _read_cached_response(cache_file: str) -> bytes:
+    """
+    Read a cached CodeQL response from disk.
+    
+    Cache files are written once per key and never modified, so the bytes
+    can be memoized by path. The bytes rather than a parsed response are
+    kept, so every caller validates its own CodeQLResponse and no caller
+    sees another's changes. Misses raise and are not memoized.
+    
+    Raises:
+        FileNotFoundError: If no cache entry exists
+    """
+    with open(cache_file, 'rb') as f:
+        return f.read()
+
 
 class CodeQLService:
     """Service for CodeQL static analysis"""
 
-    # Module 2.3: Whitelisted query suites
-    ALLOWED_QUERY_SUITES = {
-        "security-extended",
-        "security-and-quality", 
-        "security",
-        "code-scanning"
-    }
+    ALLOWED_QUERY_SUITES = ALLOWED_QUERY_SUITES
 
     def __init__(self):
         self.codeql_path = getattr(settings, 'CODEQL_PATH', 'codeql')
-        self.db_dir = Path(settings.WORKSPACE_DIR) / "codeql_dbs"
-        self.ingest_dir = Path(settings.INGEST_DIR)
+        # Absolute, so CodeQL commands mean the same through the CLI server
+        # (which has its own working directory) and a one-off subprocess
+        self.db_dir = (Path(settings.WORKSPACE_DIR) / "codeql_dbs").resolve()
+        self.ingest_dir = Path(settings.INGEST_DIR).resolve()
         self.db_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = Path(settings.WORKSPACE_DIR) / "cache" / "codeql"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         # Module 2.1: Verify CodeQL installation
         self.codeql_available = False
         self.codeql_version = None
         self._verify_codeql()
         
-    def _validate_query_suite(self, query_suite: str) -> str:
+        # Bounds concurrent pipelines started from the async API path
+        self._analysis_semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+        
+        # Long-lived CLI servers (started on first use) to skip JVM startup per
+        # command; one per concurrent analysis so they don't serialize
+        self._cli_server = None
+        if self.codeql_available and settings.CODEQL_USE_CLI_SERVER:
+            self._cli_server = CodeQLCLIServerPool(self.codeql_path, MAX_CONCURRENT_ANALYSES)
+        
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _validate_query_suite(query_suite: str) -> str:
         """
         Validate and normalize query suite name.
         
+        Memoized: the whitelist is fixed, so each suite name is checked once.
+        
         Args:
             query_suite: Query suite identifier
             
@@ -65,10 +134,10 @@ class CodeQLService:
         Raises:
             ValueError: If query suite not in whitelist
         """
-        if query_suite not in self.ALLOWED_QUERY_SUITES:
+        if query_suite not in ALLOWED_QUERY_SUITES:
             raise ValueError(
                 f"Invalid query suite: {query_suite}. "
-                f"Allowed: {', '.join(sorted(self.ALLOWED_QUERY_SUITES))}"
+                f"Allowed: {ALLOWED_QUERY_SUITES_TEXT}"
             )
         
         return query_suite
@@ -119,6 +188,25 @@ class CodeQLService:
             self.codeql_available = False
             self.codeql_version = None
 
+    def refresh_availability(self) -> bool:
+        """
+        Re-run the CodeQL installation check.
+        
+        Availability is otherwise probed once at construction and reused.
+        Restarts the CLI server so it uses the re-verified binary.
+        
+        Returns:
+            Whether CodeQL is available
+        """
+        self.close()
+        self._verify_codeql()
+        
+        self._cli_server = None
+        if self.codeql_available and settings.CODEQL_USE_CLI_SERVER:
+            self._cli_server = CodeQLCLIServerPool(self.codeql_path, MAX_CONCURRENT_ANALYSES)
+        
+        return self.codeql_available
+
     def get_status(self) -> Dict[str, any]:
         """Get CodeQL service status for health checks"""
         return {
@@ -138,6 +226,73 @@ class CodeQLService:
                 "Download from: https://github.com/github/codeql-cli-binaries"
             )
     
+    def _run_codeql(
+        self,
+        command: List[str],
+        timeout: int
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a CodeQL command, preferring the long-lived CLI server.
+        
+        Falls back to a one-off subprocess if the server cannot be started.
+        Paths in the command must be absolute: the server cannot take a
+        working directory per command, so relative paths would resolve
+        differently on the two paths.
+        
+        Args:
+            command: Full command list, starting with the CodeQL binary
+            timeout: Timeout in seconds
+            
+        Returns:
+            CompletedProcess with returncode, stdout and stderr
+            
+        Raises:
+            subprocess.TimeoutExpired: If the command exceeds the timeout
+        """
+        if self._cli_server is not None:
+            try:
+                return self._cli_server.run(command[1:], timeout=timeout)
+            except OSError as e:
+                print(f"⚠️  CodeQL CLI server unavailable, using subprocess: {str(e)}")
+                self._cli_server = None
+        
+        return subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    
+    def close(self) -> None:
+        """Stop the CodeQL CLI server processes, if any were started"""
+        if self._cli_server is not None:
+            self._cli_server.shutdown()
+    
+    def _sanitize_output(self, output: str, paths: Dict[Path, str]) -> str:
+        """
+        Prepare CodeQL stderr for an error message.
+        
+        Absolute paths are replaced with placeholders so error messages do
+        not leak the server's directory layout. Chained str.replace measured
+        faster than a single regex pass over multi-megabyte extractor logs.
+        Only the last MAX_ERROR_OUTPUT_CHARS are then kept: CodeQL reports
+        the failure at the end, and the full log would otherwise be copied
+        into the exception and the HTTP error response.
+        
+        Args:
+            output: Raw stderr from a CodeQL command
+            paths: Absolute path -> placeholder (e.g. db_path -> "[DB_PATH]")
+            
+        Returns:
+            Sanitized, bounded error text
+        """
+        for path, placeholder in paths.items():
+            output = output.replace(str(path), placeholder)
+        
+        if len(output) > MAX_ERROR_OUTPUT_CHARS:
+            output = "..." + output[-MAX_ERROR_OUTPUT_CHARS:]
+        return output
+    
     def _validate_repo_id(self, repo_id: str) -> Path:
         """
         Validate repo_id format and return source directory path.
@@ -152,10 +307,8 @@ class CodeQLService:
             ValueError: If repo_id format is invalid
             FileNotFoundError: If repository not ingested
         """
-        import re
-        
         # Validate format: must be lowercase hex, 8 characters (from Phase 1 UUID)
-        if not re.match(r'^[a-f0-9]{8}$', repo_id):
+        if not REPO_ID_RE.fullmatch(repo_id):
             raise ValueError(
                 f"Invalid repo_id format: {repo_id}. "
                 f"Must be 8-character lowercase hex (from Phase 1 ingest)"
@@ -171,6 +324,23 @@ class CodeQLService:
             )
         
         return repo_source_dir
+
+    async def analyze_repository_async(self, request: CodeQLScanRequest) -> CodeQLResponse:
+        """
+        Run analyze_repository without blocking the event loop.
+        
+        The pipeline runs in a worker thread; at most MAX_CONCURRENT_ANALYSES
+        pipelines run at once, further callers wait for a free slot.
+        
+        Args:
+            request: CodeQL scan request
+            
+        Returns:
+            Complete CodeQL response with findings
+        """
+        async with self._analysis_semaphore:
+            return await asyncio.to_thread(self.analyze_repository, request)
+
     def analyze_repository(self, request: CodeQLScanRequest) -> CodeQLResponse:
         """
         Complete CodeQL analysis pipeline.
@@ -207,39 +377,58 @@ class CodeQLService:
         # Module 2.2: Validate and locate repository
         repo_source_dir = self._validate_repo_id(request.repo_id)
         
+        # Reuse results when the source tree is unchanged since the last scan
+        cache_file = self._get_cache_path(request, repo_source_dir)
+        response = self._load_cached_response(cache_file)
+        if response is not None:
+            print(f"⚡ Using cached CodeQL results ({response.total_findings} findings)")
+            return response
+        
         # Module 2.2: Set up database path
         db_name = f"{request.repo_id}-{request.language}-db"
         db_path = self.db_dir / db_name
         
-        # Module 2.2: Create database
-        db_metadata = self._create_database(
-            repo_source_dir,
-            db_path,
-            request.language
-        )
-        
-        # Module 2.3: Validate query suite
-        validated_suite = self._validate_query_suite(request.query_suite)
-        
-        # Module 2.3: Run queries
         results_path = self.db_dir / f"{request.repo_id}-{request.language}.sarif"
-        query_metadata = self._run_queries(
-            db_path,
-            request.language,
-            validated_suite,
-            results_path
-        )
         
-        # Module 2.4: Parse SARIF
-        findings = self._parse_sarif(results_path)
+        try:
+            # Module 2.2: Create database
+            db_metadata = self._create_database(
+                repo_source_dir,
+                db_path,
+                request.language
+            )
+            
+            # Module 2.3: Validate query suite
+            validated_suite = self._validate_query_suite(request.query_suite)
+            
+            # Module 2.3: Run queries
+            query_metadata = self._run_queries(
+                db_path,
+                request.language,
+                validated_suite,
+                results_path
+            )
+            
+            # Module 2.4: Parse SARIF (findings past max_findings are only counted)
+            overflow = Counter()
+            findings = self._parse_sarif(results_path, request.max_findings, overflow)
+        finally:
+            # Databases are rebuilt for every scan and the parsed results are
+            # cached below, so keeping the (often multi-GB) artifacts only
+            # costs disk
+            if not settings.CODEQL_KEEP_DATABASES:
+                self._remove_scan_artifacts(db_path, results_path)
         
         # Module 2.5: Create response
         response = self._create_response(
             request.repo_id,
             request.language,
-            findings
+            findings,
+            overflow
         )
         
+        self._write_cache(cache_file, response)
+        
         print(f"\n{'='*60}")
         print(f"✅ CodeQL Analysis Complete")
         print(f"   Total Findings: {response.total_findings}")
@@ -249,6 +438,101 @@ class CodeQLService:
         
         return response
     
+    def _remove_scan_artifacts(self, db_path: Path, results_path: Path) -> None:
+        """
+        Delete a scan's database and SARIF output.
+        
+        Cleanup failures are logged but never fail the analysis.
+        """
+        try:
+            shutil.rmtree(db_path, ignore_errors=True)
+            results_path.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"⚠️  Failed to remove CodeQL scan artifacts: {str(e)}")
+    
+    def _compute_source_signature(self, source_dir: Path) -> str:
+        """
+        Compute a content signature for an ingested source tree.
+        
+        Uses relative path, size and mtime of every file, which changes
+        whenever file contents change without reading the files.
+        
+        Args:
+            source_dir: Path to repository source
+            
+        Returns:
+            SHA256 hex digest
+        """
+        hasher = hashlib.sha256()
+        
+        for root, dirs, files in os.walk(source_dir):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                rel_path = os.path.relpath(file_path, source_dir)
+                hasher.update(f"{rel_path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+        
+        return hasher.hexdigest()
+    
+    def _get_cache_path(self, request: CodeQLScanRequest, source_dir: Path) -> Path:
+        """
+        Get the result cache file for a scan request.
+        
+        Key covers repo, language, query suite, source content and CodeQL
+        version, so any change to these forces a fresh scan.
+        """
+        key_material = ":".join([
+            request.repo_id,
+            request.language,
+            request.query_suite or "",
+            str(request.max_findings or ""),
+            self._compute_source_signature(source_dir),
+            self.codeql_version or ""
+        ])
+        key = hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def _load_cached_response(self, cache_file: Path) -> Optional[CodeQLResponse]:
+        """
+        Load a cached CodeQL response, or None on a miss.
+        
+        An unreadable entry (e.g. truncated by a full disk) counts as a miss
+        and is deleted, so the scan runs again and rewrites it.
+        """
+        try:
+            raw = _read_cached_response(str(cache_file))
+        except FileNotFoundError:
+            return None
+        
+        try:
+            return CodeQLResponse.model_validate_json(raw)
+        except ValueError:
+            print(f"⚠️  Discarding unreadable CodeQL result cache: {cache_file.name}")
+            # The bad bytes may be memoized; entries cannot be evicted one by one
+            _read_cached_response.cache_clear()
+            cache_file.unlink(missing_ok=True)
+            return None
+    
+    def _write_cache(self, cache_file: Path, response: CodeQLResponse) -> None:
+        """
+        Persist a CodeQL response to the result cache.
+        
+        Written to a temp file of its own and renamed, so readers never see
+        partial JSON and concurrent scans never write the same temp file.
+        Cache failures are logged but never fail the analysis.
+        """
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_file.write_text(response.model_dump_json(), encoding='utf-8')
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            tmp_file.unlink(missing_ok=True)
+            print(f"⚠️  Failed to write CodeQL result cache: {str(e)}")
+    
     def _create_database(
         self, 
         source_dir: Path, 
@@ -269,6 +553,8 @@ class CodeQLService:
         Raises:
             RuntimeError: If database creation fails
         """
+        assert source_dir.is_absolute() and db_path.is_absolute(), "CodeQL paths must be absolute"
+        
         # Ensure CodeQL is available
         self._ensure_codeql_available()
         
@@ -288,6 +574,7 @@ class CodeQLService:
                 str(db_path),
                 f"--language={language}",
                 f"--source-root={source_dir}",
+                f"--threads={CODEQL_THREADS}",
                 "--overwrite"
             ]
             
@@ -295,19 +582,15 @@ class CodeQLService:
             print(f"   Command: {' '.join(command)}")
             
             # Run with timeout
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                timeout=DB_CREATE_TIMEOUT,
-                cwd=str(source_dir)  # Run from source directory
-            )
+            result = self._run_codeql(command, timeout=DB_CREATE_TIMEOUT)
             
             # Check if successful
             if result.returncode != 0:
                 # Sanitize error message (remove absolute paths)
-                error_msg = result.stderr.replace(str(source_dir), "[SOURCE]")
-                error_msg = error_msg.replace(str(db_path), "[DB_PATH]")
+                error_msg = self._sanitize_output(
+                    result.stderr,
+                    {source_dir: "[SOURCE]", db_path: "[DB_PATH]"}
+                )
                 raise RuntimeError(f"Database creation failed: {error_msg}")
             
             # Verify database was created (check for marker file)
@@ -368,6 +651,8 @@ class CodeQLService:
         Raises:
             RuntimeError: If query execution fails
         """
+        assert db_path.is_absolute() and output_path.is_absolute(), "CodeQL paths must be absolute"
+        
         # Ensure CodeQL is available
         self._ensure_codeql_available()
         
@@ -387,6 +672,7 @@ class CodeQLService:
                 query_suite_id,
                 "--format=sarif-latest",
                 f"--output={output_path}",
+                f"--threads={CODEQL_THREADS}",
                 "--rerun"
             ]
             
@@ -394,18 +680,9 @@ class CodeQLService:
             print(f"   Command: {' '.join(command)}")
             
             # Execute with timeout
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                timeout=ANALYZE_TIMEOUT
-            )
+            result = self._run_codeql(command, timeout=ANALYZE_TIMEOUT)
             
             if result.returncode != 0:
-                # Sanitize error
-                error_msg = result.stderr.replace(str(db_path), "[DB_PATH]")
-                error_msg = error_msg.replace(str(output_path), "[OUTPUT]")
-                
                 # Check for common errors
                 if "Could not resolve query suite" in result.stderr:
                     raise ValueError(
@@ -413,6 +690,11 @@ class CodeQLService:
                         f"Verify language/suite combination is valid."
                     )
                 
+                # Sanitize error
+                error_msg = self._sanitize_output(
+                    result.stderr,
+                    {db_path: "[DB_PATH]", output_path: "[OUTPUT]"}
+                )
                 raise RuntimeError(f"Query execution failed: {error_msg}")
             
             # Validate output file exists
@@ -421,31 +703,24 @@ class CodeQLService:
                     "Query execution completed but SARIF file not created"
                 )
             
-            # Validate SARIF is valid JSON
-            try:
-                with open(output_path, 'r') as f:
-                    sarif_data = json.load(f)
-                
-                # Count results for logging
-                total_results = 0
-                for run in sarif_data.get("runs", []):
-                    total_results += len(run.get("results", []))
-                
-                print(f"✅ Query execution complete: {total_results} findings")
-                
-            except json.JSONDecodeError as e:
+            # Cheap sanity check only: _parse_sarif streams the file next and
+            # reports malformed JSON, so it is not parsed twice per scan
+            with open(output_path, 'rb') as f:
+                head = f.read(4096).lstrip()
+            if not head.startswith(b"{"):
                 raise RuntimeError(
-                    f"SARIF file is not valid JSON: {str(e)}"
+                    "SARIF file is not valid JSON: expected a JSON object"
                 )
             
+            print("✅ Query execution complete")
+            
             end_time = datetime.utcnow()
             duration = (end_time - start_time).total_seconds()
             
             return {
                 "success": True,
                 "duration_seconds": duration,
-                "output_path": str(output_path),
-                "total_results": total_results
+                "output_path": str(output_path)
             }
             
         except subprocess.TimeoutExpired:
@@ -453,12 +728,21 @@ class CodeQLService:
                 f"Query execution timed out after {ANALYZE_TIMEOUT} seconds"
             )
     
-    def _parse_sarif(self, sarif_path: Path) -> List[CodeQLFinding]:
+    def _parse_sarif(
+        self,
+        sarif_path: Path,
+        max_findings: Optional[int] = None,
+        overflow: Optional[Counter] = None
+    ) -> List[CodeQLFinding]:
         """
         Parse SARIF format into CodeQLFinding objects.
         
         Args:
             sarif_path: Path to SARIF JSON file
+            max_findings: Collect at most this many findings (None = no limit)
+            overflow: If given, findings past max_findings are still read and
+                tallied here by severity, so counts can cover the whole scan;
+                otherwise parsing stops at max_findings
             
         Returns:
             List of validated CodeQLFinding objects
@@ -467,36 +751,24 @@ class CodeQLService:
             - Skips results with missing locations
             - Defaults unknown severity levels to "medium"
             - Validates all findings through Pydantic
+            - Streams results with ijson when installed, so memory does not
+              grow with the SARIF file size
         """
         findings = []
         
         try:
-            # Load SARIF file
-            with open(sarif_path, 'r', encoding='utf-8') as f:
-                sarif_data = json.load(f)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"Invalid SARIF JSON: {str(e)}")
-        except FileNotFoundError:
-            raise RuntimeError(f"SARIF file not found: {sarif_path}")
-        
-        # Iterate over runs
-        for run in sarif_data.get("runs", []):
-            # Extract rule metadata for recommendations
-            rule_metadata = self._extract_rule_metadata(run)
-            
-            for result in run.get("results", []):
+            for result, rule_metadata in self._iter_sarif_results(sarif_path):
+                if overflow is None and max_findings is not None and len(findings) >= max_findings:
+                    print(f"⚠️  Reached max_findings={max_findings}, skipping remaining results")
+                    break
+                
                 try:
                     # Extract basic fields
                     rule_id = result.get("ruleId", "unknown")
                     message = result.get("message", {}).get("text", "No description")
                     
                     # Map severity level
-                    level = result.get("level", "note")
-                    severity = self._map_severity(level)
-                    
-                    # Log unknown severity levels (optional, for visibility)
-                    if level.lower() not in SARIF_SEVERITY_MAP:
-                        print(f"⚠️  Unknown severity level '{level}', defaulting to 'medium'")
+                    severity = self._map_severity(result.get("level", "note"))
                     
                     # Extract location information
                     locations = result.get("locations", [])
@@ -505,7 +777,17 @@ class CodeQLService:
                         print(f"⚠️  Skipping result {rule_id}: no locations")
                         continue
                     
+                    # Get recommendation from metadata (shared by all locations)
+                    recommendation = rule_metadata.get(rule_id, DEFAULT_RECOMMENDATION)
+                    
                     for location in locations:
+                        if max_findings is not None and len(findings) >= max_findings:
+                            if overflow is None:
+                                break
+                            # Counted, not collected
+                            overflow[severity] += 1
+                            continue
+                        
                         physical_location = location.get("physicalLocation", {})
                         artifact_location = physical_location.get("artifactLocation", {})
                         region = physical_location.get("region", {})
@@ -514,12 +796,6 @@ class CodeQLService:
                         start_line = region.get("startLine", 0)
                         end_line = region.get("endLine", start_line)
                         
-                        # Get recommendation from metadata
-                        recommendation = rule_metadata.get(
-                            rule_id,
-                            "Review and fix the identified issue"
-                        )
-                        
                         # Create and validate finding
                         try:
                             finding = CodeQLFinding(
@@ -544,9 +820,49 @@ class CodeQLService:
                     print(f"⚠️  Error parsing result: {str(e)}")
                     continue
         
+        except SARIF_DECODE_ERRORS as e:
+            raise RuntimeError(f"Invalid SARIF JSON: {str(e)}")
+        except FileNotFoundError:
+            raise RuntimeError(f"SARIF file not found: {sarif_path}")
+        
+        if overflow:
+            print(f"⚠️  Reached max_findings={max_findings}; counted {sum(overflow.values())} more")
         print(f"📊 Parsed {len(findings)} valid findings from SARIF")
         return findings
     
+    def _iter_sarif_results(self, sarif_path: Path) -> Iterator[Tuple[Dict, Dict[str, str]]]:
+        """
+        Yield (result, rule_metadata) pairs from a SARIF file.
+        
+        With ijson the file is streamed twice: once for rule metadata, once
+        for results, each as individual objects. Rule IDs are namespaced
+        per language (e.g. "py/sql-injection"), so metadata from all runs
+        is merged. Without ijson the whole document is loaded with orjson.
+        
+        Raises:
+            FileNotFoundError: If the SARIF file does not exist
+            orjson.JSONDecodeError / ijson.JSONError: If the SARIF is malformed
+        """
+        if IJSON_AVAILABLE:
+            with open(sarif_path, 'rb') as f:
+                rule_metadata = {}
+                for rule in ijson.items(f, "runs.item.tool.driver.rules.item"):
+                    self._add_rule_metadata(rule_metadata, rule)
+                
+                f.seek(0)
+                for result in ijson.items(f, "runs.item.results.item"):
+                    yield result, rule_metadata
+            return
+        
+        # orjson decodes the whole document in native code
+        sarif_data = orjson.loads(sarif_path.read_bytes())
+        
+        for run in sarif_data.get("runs", []):
+            # Extract rule metadata for recommendations
+            rule_metadata = self._extract_rule_metadata(run)
+            for result in run.get("results", []):
+                yield result, rule_metadata
+    
     def _extract_rule_metadata(self, run: Dict) -> Dict[str, str]:
         """
         Extract rule metadata (recommendations) from SARIF run.
@@ -564,21 +880,31 @@ class CodeQLService:
         rules = driver.get("rules", [])
         
         for rule in rules:
-            rule_id = rule.get("id")
-            if not rule_id:
-                continue
-            
-            # Priority: help.text > shortDescription.text > fallback
-            recommendation = (
-                rule.get("help", {}).get("text", "") or
-                rule.get("shortDescription", {}).get("text", "") or
-                "Review and fix the identified issue"
-            )
-            
-            metadata[rule_id] = recommendation
+            self._add_rule_metadata(metadata, rule)
         
         return metadata
     
+    def _add_rule_metadata(self, metadata: Dict[str, str], rule: Dict) -> None:
+        """
+        Add a single SARIF rule's recommendation to the metadata dict.
+        
+        Args:
+            metadata: Dict mapping rule_id to recommendation text (updated in place)
+            rule: SARIF reportingDescriptor object
+        """
+        rule_id = rule.get("id")
+        if not rule_id:
+            return
+        
+        # Priority: help.text > shortDescription.text > fallback
+        recommendation = (
+            rule.get("help", {}).get("text", "") or
+            rule.get("shortDescription", {}).get("text", "") or
+            DEFAULT_RECOMMENDATION
+        )
+        
+        metadata[rule_id] = recommendation
+    
     def _map_severity(self, sarif_level: str) -> SeverityEnum:
         """
         Map SARIF severity level to our severity taxonomy
@@ -588,12 +914,19 @@ class CodeQLService:
             sarif_level: SARIF level (error, warning, note, none)
             
         Returns:
-            SeverityEnum value
+            SeverityEnum value (medium if the level is unknown)
         """
-        return SARIF_SEVERITY_MAP.get(
-            sarif_level.lower(), 
-            SeverityEnum.MEDIUM  # Default to medium if unknown
-        )
+        # CodeQL emits lowercase levels, so only other spellings pay for a lower() copy
+        severity = SARIF_SEVERITY_MAP.get(sarif_level)
+        if severity is None:
+            severity = SARIF_SEVERITY_MAP.get(sarif_level.lower())
+        
+        # Log unknown severity levels (optional, for visibility)
+        if severity is None:
+            print(f"⚠️  Unknown severity level '{sarif_level}', defaulting to 'medium'")
+            severity = MEDIUM
+        
+        return severity
     
     def _count_severities(self, findings: List[CodeQLFinding]) -> Dict[str, int]:
         """
@@ -606,30 +939,19 @@ class CodeQLService:
             Dict with counts: {severity_level: count}
             
         Note:
-            Explicit loop (no library) for readability and debugging
+            Tallied with Counter (C-implemented) in a single pass; every
+            SeverityEnum level is present in the result, even at zero
         """
-        counts = {
-            "critical": 0,
-            "high": 0,
-            "medium": 0,
-            "low": 0
-        }
+        tally = Counter(map(_finding_severity, findings))
         
-        for finding in findings:
-            severity = finding.severity.value
-            if severity in counts:
-                counts[severity] += 1
-            else:
-                # Should never happen due to Pydantic validation
-                print(f"⚠️  Unexpected severity: {severity}")
-        
-        return counts
+        return {severity.value: tally[severity] for severity in SeverityEnum}
     
     def _create_response(
         self,
         repo_id: str,
         language: str,
-        findings: List[CodeQLFinding]
+        findings: List[CodeQLFinding],
+        overflow: Optional[Counter] = None
     ) -> CodeQLResponse:
         """
         Create CodeQLResponse with aggregated findings and counts.
@@ -638,23 +960,32 @@ class CodeQLService:
             repo_id: Repository identifier
             language: Programming language
             findings: List of findings
+            overflow: Severities of findings left out by max_findings
             
         Returns:
-            Validated CodeQLResponse
+            CodeQLResponse built from already-validated findings; counts
+            cover the left-out findings too, and truncated is set if any
         """
         # Count severities
         counts = self._count_severities(findings)
-        
-        # Create response (Pydantic auto-validates)
-        response = CodeQLResponse(
+        omitted = 0
+        if overflow:
+            for severity, count in overflow.items():
+                counts[severity.value] += count
+            omitted = sum(overflow.values())
+        
+        # Findings were validated one by one in _parse_sarif and the counts are
+        # derived from them; skip re-walking the list in pydantic
+        response = CodeQLResponse.model_construct(
             repo_id=repo_id,
             language=language,
             findings=findings,
-            total_findings=len(findings),
+            total_findings=len(findings) + omitted,
             critical_count=counts["critical"],
             high_count=counts["high"],
             medium_count=counts["medium"],
-            low_count=counts["low"]
+            low_count=counts["low"],
+            truncated=omitted > 0
         )
         
         # Log summary
@@ -676,3 +1007,14 @@ class CodeQLService:
         )
         
         return response
+
+
+@lru_cache(maxsize=1)
+def get_codeql_service() -> CodeQLService:
+    """
+    Process-wide CodeQLService (one version probe, one CLI server)
+    
+    The analysis router and the orchestrator's run_codeql action share this
+    instance instead of each spawning `codeql version` (a JVM start) on creation.
+    """
+    return CodeQLService()
@@ -3,6 +3,7 @@ JSON schemas for Gemini Interaction API responses.
 Explicit schemas for anti-hallucination.
 """
 
+from itertools import pairwise
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, field_validator
 
@@ -59,10 +60,8 @@ class AnalysisSchema(BaseModel):
     @classmethod
     def validate_issues_ordered(cls, v):
         """Ensure issues are ordered by priority"""
-        if not v:
-            return v
-        priorities = [issue.priority for issue in v]
-        if priorities != sorted(priorities):
+        # One pass over adjacent pairs; no sorted copy of the priorities
+        if any(a.priority > b.priority for a, b in pairwise(v)):
             raise ValueError("Issues must be ordered by priority (1=highest)")
         return v
 
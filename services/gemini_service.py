@@ -1,15 +1,50 @@
-from google import genai
 from typing import Dict, Any, Optional
 import os
+import re
 import json
 import hashlib
+import threading
+import time
 import uuid
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Any, Optional, List
 
 from datetime import datetime
 from config import settings
 from services.gemini_schemas import SCHEMA_REGISTRY
 
+VERIFY_CACHE_TTL = 3600  # Seconds a successful API check is trusted across restarts
+VERIFY_CACHE_FILE = Path(settings.WORKSPACE_DIR) / "cache" / "gemini_verified.json"
+MAX_EVIDENCE_CHARS = 300_000  # Numbered file text per analysis prompt (~75k tokens)
+BREAKER_FAILURE_THRESHOLD = 5  # Consecutive overload errors before Gemini calls are skipped
+BREAKER_COOLDOWN = 60  # Seconds to skip Gemini calls once the breaker opens
+BREAKER_STATUS_CODES = frozenset({429, 503})  # Rate-limited / overloaded responses
+
+# ":line" references inside an evidence citation (e.g. "src/db.py:125-127");
+# the path is whatever precedes it, so quotes, brackets and spaces are fine
+CITATION_LINE_RE = re.compile(r":(\d+)")
+
+def _strip_code_fence(text: str) -> str:
+    """
+    Return the body of a response wrapped in a ```lang ... ``` fence
+    
+    Responses run to tens of KB; the fence is located with C-level str
+    methods and the body sliced out once, rather than copying the text at
+    every strip/slice step. Unfenced text is returned stripped.
+    """
+    text = text.strip()
+    if not text.startswith("```"):
+        return text
+    
+    # Body starts after the opening fence line ("```json"), or right after
+    # the backticks for a one-line fence
+    first_newline = text.find("\n")
+    start = first_newline + 1 if first_newline != -1 else 3
+    end = len(text) - 3 if text.endswith("```") and len(text) - 3 >= start else len(text)
+    return text[start:end].strip()
+
+
 class GeminiService:
     """Service for Gemini Interaction API orchestration"""
     
@@ -26,6 +61,11 @@ class GeminiService:
         # Module 3.5: Conversation storage (In-memory for now)
         self.active_chats: Dict[str, Any] = {}
         
+        # Circuit breaker for repeated 429/503 responses (see _create_interaction)
+        self._breaker_lock = threading.Lock()
+        self._breaker_failures = 0
+        self._breaker_open_until = 0.0
+        
         # Module 3.1: Verify Gemini API access
         self._verify_gemini()
     
@@ -45,9 +85,21 @@ class GeminiService:
             ).hexdigest()[:8]
             self.api_key_hash = key_hash
             
-            # Initialize client
+            # Initialize client (google.genai takes ~0.7s to import; only pay
+            # for it once a key is configured)
+            from google import genai
             self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
             
+            # Skip the network probe if this key/model passed one recently
+            # (restarts, --reload and multiple workers would each re-probe)
+            cache_key = hashlib.sha256(
+                f"{settings.GEMINI_API_KEY}:{self.gemini_model}".encode()
+            ).hexdigest()
+            if self._verified_recently(cache_key):
+                self.gemini_available = True
+                print(f"✅ Gemini API verified (cached): model={self.gemini_model}, key_hash={key_hash}")
+                return
+            
             # Test with minimal interaction (no thinking, fast)
             # Use a dummy prompt to check connectivity
             test_interaction = self.client.interactions.create(
@@ -63,6 +115,7 @@ class GeminiService:
             if test_interaction.outputs:
                 response_text = test_interaction.outputs[-1].text
                 self.gemini_available = True
+                self._remember_verified(cache_key)
                 print(f"✅ Gemini API verified: model={self.gemini_model}, key_hash={key_hash}")
                 print(f"   Response: {response_text}")
             else:
@@ -84,6 +137,39 @@ class GeminiService:
             print(f"⚠️  {error_msg}")
             self.gemini_available = False
     
+    def _verified_recently(self, cache_key: str) -> bool:
+        """
+        Check whether a verification for cache_key succeeded within VERIFY_CACHE_TTL
+        
+        Args:
+            cache_key: SHA-256 of "<api key>:<model>" (the key itself is never stored)
+        """
+        try:
+            verified = json.loads(VERIFY_CACHE_FILE.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        
+        verified_at = verified.get(cache_key) if isinstance(verified, dict) else None
+        return isinstance(verified_at, (int, float)) and time.time() - verified_at < VERIFY_CACHE_TTL
+    
+    def _remember_verified(self, cache_key: str) -> None:
+        """
+        Record a successful verification (best effort; failures are ignored)
+        """
+        try:
+            verified = json.loads(VERIFY_CACHE_FILE.read_text(encoding="utf-8"))
+            if not isinstance(verified, dict):
+                verified = {}
+        except (OSError, ValueError):
+            verified = {}
+        
+        verified[cache_key] = time.time()
+        try:
+            VERIFY_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            VERIFY_CACHE_FILE.write_text(json.dumps(verified), encoding="utf-8")
+        except OSError:
+            pass
+    
     def get_status(self) -> Dict[str, Any]:
         """Get Gemini service status for health checks"""
         return {
@@ -112,11 +198,6 @@ class GeminiService:
         # Call the more robust helper
         # We need to map schema class to registry key if possible, or just use class logic
         # For backward compatibility, keep basic logic but prefer _parse_structured_output
-        try:
-             # Basic stripping logic from before is fine for simple cases
-             pass
-        except:
-             pass
         
         # ACTUALLY, let's redirect to the new robust method if it's a known schema type
         # But this method signature takes a specific Schema Class, not a string key.
@@ -124,15 +205,7 @@ class GeminiService:
         
         try:
             # 1. Strip markdown code blocks
-            clean_text = response_text.strip()
-            if clean_text.startswith("```"):
-                first_newline = clean_text.find("\n")
-                if first_newline != -1:
-                    clean_text = clean_text[first_newline+1:]
-                if clean_text.endswith("```"):
-                    clean_text = clean_text[:-3]
-            
-            clean_text = clean_text.strip()
+            clean_text = _strip_code_fence(response_text)
             
             # 2. Parse JSON
             data = json.loads(clean_text)
@@ -156,15 +229,8 @@ class GeminiService:
             raise ValueError(f"Unknown schema key: {schema_key}")
 
         try:
-            # Re-use the cleaning logic from parse_response
-            clean_text = response_text.strip()
-            if clean_text.startswith("```"):
-                first_newline = clean_text.find("\n")
-                if first_newline != 1:
-                    clean_text = clean_text[first_newline+1:]
-                if clean_text.endswith("```"):
-                    clean_text = clean_text[:-3]
-            clean_text = clean_text.strip()
+            # Same cleaning as parse_response
+            clean_text = _strip_code_fence(response_text)
             
             data = json.loads(clean_text)
             model = schema_cls.model_validate(data)
@@ -176,6 +242,11 @@ class GeminiService:
 
     def _fix_json_with_gemini(self, malformed_json: str, schema_key: str) -> Dict[str, Any]:
         """Attempt to fix malformed JSON using Gemini"""
+        # The failure came before any output (e.g. the API call itself);
+        # there is nothing for a second model call to repair
+        if not malformed_json or not malformed_json.strip():
+            raise ValueError("Auto-fix skipped: no response text to repair")
+        
         prompt = f"""Fix this malformed JSON to match the {schema_key} schema.
 Turn this:
 {malformed_json[:1000]}...
@@ -183,7 +254,7 @@ Turn this:
 Into valid JSON. Return ONLY the JSON."""
         
         try:
-            resp = self.client.interactions.create(
+            resp = self._create_interaction(
                 model=self.gemini_model,
                 input=prompt,
                 generation_config={"temperature": 0.0}
@@ -193,6 +264,41 @@ Into valid JSON. Return ONLY the JSON."""
         except Exception as e:
             raise ValueError(f"Auto-fix failed: {str(e)}")
 
+    def _create_interaction(self, **kwargs) -> Any:
+        """
+        Call interactions.create behind a circuit breaker
+        
+        The client already retries a 429/503 with backoff; once
+        BREAKER_FAILURE_THRESHOLD calls in a row still fail that way, calls
+        fail fast for BREAKER_COOLDOWN seconds instead of each paying for
+        the full retry sequence against an overloaded API.
+        
+        Raises:
+            RuntimeError: If the breaker is open
+        """
+        with self._breaker_lock:
+            remaining = self._breaker_open_until - time.monotonic()
+        if remaining > 0:
+            raise RuntimeError(
+                f"Gemini API is overloaded; skipping calls for {remaining:.0f}s"
+            )
+        
+        try:
+            interaction = self.client.interactions.create(**kwargs)
+        except Exception as e:
+            if getattr(e, "status_code", None) in BREAKER_STATUS_CODES:
+                with self._breaker_lock:
+                    self._breaker_failures += 1
+                    if self._breaker_failures >= BREAKER_FAILURE_THRESHOLD:
+                        self._breaker_failures = 0
+                        self._breaker_open_until = time.monotonic() + BREAKER_COOLDOWN
+                        print(f"⚠️  Gemini overloaded; pausing calls for {BREAKER_COOLDOWN}s")
+            raise
+        
+        with self._breaker_lock:
+            self._breaker_failures = 0
+        return interaction
+
     def _get_text_from_interaction(self, interaction) -> str:
         """Helper to extract text from interaction outputs safely"""
         # Iterate backwards to find the last text output
@@ -277,7 +383,7 @@ Create the analysis plan in JSON format."""
             start_time = datetime.utcnow()
             
             # CRITICAL FIXES:
-            interaction = self.client.interactions.create(
+            interaction = self._create_interaction(
                 model=self.gemini_model,
                 input=user_prompt,
                 system_instruction=system_instruction,
@@ -391,7 +497,7 @@ CRITICAL RULES:
             if previous_interaction_id:
                 print(f"   Using previous interaction: {previous_interaction_id}")
                 
-                interaction = self.client.interactions.create(
+                interaction = self._create_interaction(
                     model=self.gemini_model,
                     input=f"""Continue analysis with new data:
 
@@ -408,7 +514,7 @@ Provide comprehensive analysis in JSON format.""",
                     store=True  # ✅ FIX
                 )
             else:
-                interaction = self.client.interactions.create(
+                interaction = self._create_interaction(
                     model=self.gemini_model,
                     input=context,
                     system_instruction=system_instruction,
@@ -461,8 +567,9 @@ Provide comprehensive analysis in JSON format.""",
                         text_res,
                         "analysis"
                     )
-                except:
-                    pass # raise original error
+                except Exception as fix_error:
+                    # Raise the original error below, but say why repair failed
+                    print(f"⚠️  JSON repair failed: {str(fix_error)}")
             
             raise ValueError(error_msg)
 
@@ -508,6 +615,14 @@ Provide comprehensive analysis in JSON format.""",
         if not issues:
             return
 
+        # Built once: each cited line only checks the findings on that line
+        # instead of formatting every finding again
+        paths_by_line: Dict[int, List[str]] = {}
+        for f in codeql_findings:
+            paths_by_line.setdefault(f.start_line, []).append(f.file_path)
+        # Issues often cite the same file; scan repo_content once per path
+        in_repo_content: Dict[str, bool] = {}
+
         for issue in issues:
             valid_evidence_count = 0
             evidence_list = issue.get("evidence", [])
@@ -515,13 +630,20 @@ Provide comprehensive analysis in JSON format.""",
             for cit in evidence_list:
                 # Check 1: Is it in CodeQL findings?
                 # Citations form "file:line"
-                if any(f"{f.file_path}:{f.start_line}" in cit for f in codeql_findings):
+                if any(
+                    cit.endswith(path, 0, match.start())
+                    for match in CITATION_LINE_RE.finditer(cit)
+                    for path in paths_by_line.get(int(match.group(1)), ())
+                ):
                     valid_evidence_count += 1
                     continue
 
                 # Check 2: Is it in repo content?
                 base_cit = cit.split(':')[0] if ':' in cit else cit
-                if base_cit in repo_content:
+                found = in_repo_content.get(base_cit)
+                if found is None:
+                    found = in_repo_content[base_cit] = base_cit in repo_content
+                if found:
                      valid_evidence_count += 1
             
             if valid_evidence_count == 0 and evidence_list:
@@ -557,7 +679,7 @@ Provide comprehensive analysis in JSON format.""",
             print(f"💬 Continuing conversation from: {interaction_id}")
             start_time = datetime.utcnow()
             
-            interaction = self.client.interactions.create(
+            interaction = self._create_interaction(
                 model=self.gemini_model,
                 input=full_input,
                 previous_interaction_id=interaction_id,
@@ -597,15 +719,47 @@ Provide comprehensive analysis in JSON format.""",
             raise ValueError(f"Continuation failed: {str(e)}")
 
     def _format_evidence(self, file_contents: Dict[str, str]) -> str:
-        """Format file contents into a clear, delimited string for the LLM"""
+        """
+        Format file contents into a clear, delimited string for the LLM
+        
+        Files are added in plan order while they fit in MAX_EVIDENCE_CHARS;
+        the rest are listed by name only, so a long plan cannot produce a
+        prompt that slows (or overflows) the model.
+        """
         evidence_parts = []
+        total_chars = 0
+        omitted = []
         for path, content in file_contents.items():
-            evidence_parts.append(f"--- START FILE: {path} ---")
-            
-            lines = content.splitlines()
-            numbered_lines = [f"{i+1:4d} | {line}" for i, line in enumerate(lines)]
-            evidence_parts.append("\n".join(numbered_lines))
+            # Numbering only lengthens a file, so one already over budget
+            # is omitted without building its numbered copy
+            if evidence_parts and total_chars + len(content) > MAX_EVIDENCE_CHARS:
+                omitted.append(path)
+                continue
+            numbered = "\n".join([f"{i:4d} | {line}" for i, line in enumerate(content.splitlines(), 1)])
+            if evidence_parts and total_chars + len(numbered) > MAX_EVIDENCE_CHARS:
+                omitted.append(path)
+                continue
+            total_chars += len(numbered)
             
+            evidence_parts.append(f"--- START FILE: {path} ---")
+            evidence_parts.append(numbered)
             evidence_parts.append(f"--- END FILE: {path} ---\n")
+        
+        if omitted:
+            evidence_parts.append(f"--- OMITTED FILES (evidence limit reached): {', '.join(omitted)} ---")
             
         return "\n".join(evidence_parts)
+
+
+@lru_cache(maxsize=1)
+def get_gemini_service() -> GeminiService:
+    """
+    Process-wide GeminiService (one genai.Client, one verification call)
+    
+    main.py's health check and the orchestrator share this instance instead
+    of each building a client and probing the API at startup. Concurrent
+    calls share the client's httpx pool, whose defaults (100 connections,
+    20 kept alive) already exceed the orchestrator's concurrency, so no
+    http_options are passed.
+    """
+    return GeminiService()
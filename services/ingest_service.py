@@ -3,16 +3,23 @@ Ingest Service - Repository cloning and conversion to markdown
 Implements safe subprocess calls, encoding fallback, and size limits
 """
 
+import codecs
 import os
+import re
 import shutil
 import subprocess
 import json
 import uuid
 import hashlib
+import itertools
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from fnmatch import fnmatch
+from fnmatch import translate
+from functools import lru_cache
+from operator import attrgetter
 
 try:
     import git
@@ -29,6 +36,34 @@ from models.responses import IngestResponse
 MAX_BYTES_PER_FILE = 200_000  # 200KB per file to avoid huge embeddings
 CMD_TIMEOUT = 600  # 10 minutes timeout for subprocess calls
 REPO2TXT_TIMEOUT = 300  # 5 minutes for repo2txt
+GIT_LS_FILES_TIMEOUT = 120  # 2 minutes to list files of a checkout
+MAX_STRUCTURE_FILES = 500  # Files listed by get_file_structure (prompt context)
+STRUCTURE_CACHE_SIZE = 64  # File listings kept by get_file_structure (one per repo_id/limit)
+CLONE_CACHE_TTL = 60  # Reuse a clone of the same URL for 60s without contacting the remote
+INGEST_CACHE_SIZE = 64  # Clones / ingest outputs remembered for reuse (oldest evicted first)
+REPO_MD_HEADER_LINES = 3  # Title, blank line and "Generated:" line at the top of repo.md
+LINE_COUNT_BLOCK_SIZE = 1 << 20  # Bytes read per block when counting lines for stats
+
+OutputCacheKey = Tuple[str, str, Tuple[str, ...], Tuple[str, ...]]
+_entry_name = attrgetter('name')
+
+
+@lru_cache(maxsize=64)
+def _compile_globs(patterns: Tuple[str, ...]) -> Callable[[str], Optional[re.Match]]:
+    """
+    Compile glob patterns into one regex matcher
+    
+    Same semantics as any(fnmatch(name, p) for p in patterns), but each path
+    is checked with a single regex match instead of one fnmatch call per
+    pattern. Callers pass names through os.path.normcase, as fnmatch does.
+    
+    Args:
+        patterns: Non-empty tuple of glob patterns
+        
+    Returns:
+        Bound `match` of the combined pattern
+    """
+    return re.compile("|".join(translate(os.path.normcase(p)) for p in patterns)).match
 
 
 class IngestService:
@@ -37,6 +72,44 @@ class IngestService:
     def __init__(self):
         self.ingest_dir = Path(settings.INGEST_DIR)
         self.ingest_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Normalized URL -> (monotonic time last verified, clone directory)
+        self._clone_cache: Dict[str, Tuple[float, Path]] = {}
+        
+        # (normalized URL, HEAD sha, include, exclude) -> (ingest dir, stats)
+        self._output_cache: Dict[OutputCacheKey, Tuple[Path, Dict]] = {}
+        self._ingest_cache_lock = threading.Lock()  # guards both; ingests run in worker threads
+        
+        # (repo_id, limit) -> relative paths; an ingested source never changes
+        self._structure_cache: Dict[Tuple[str, int], List[str]] = {}
+        self._structure_cache_lock = threading.Lock()  # plan steps run in worker threads
+    
+    def clear_clone_cache(self) -> None:
+        """
+        Forget previously cloned repositories (next ingest clones again)
+        """
+        with self._ingest_cache_lock:
+            self._clone_cache.clear()
+            self._output_cache.clear()
+    
+    def _store_cached(self, cache: Dict, key: Any, value: Any) -> None:
+        """
+        Store a clone/output cache entry as the newest, evicting the oldest
+        once INGEST_CACHE_SIZE entries are kept
+        """
+        with self._ingest_cache_lock:
+            cache.pop(key, None)
+            if len(cache) >= INGEST_CACHE_SIZE:
+                # Dicts keep insertion order
+                del cache[next(iter(cache))]
+            cache[key] = value
+    
+    def _drop_cached(self, cache: Dict, key: Any) -> None:
+        """
+        Forget a clone/output cache entry (a concurrent ingest may have dropped it too)
+        """
+        with self._ingest_cache_lock:
+            cache.pop(key, None)
     
     def ingest_repository(self, request: IngestRequest) -> IngestResponse:
         """
@@ -80,19 +153,29 @@ class IngestService:
         else:
             raise ValueError("Either url or local_path must be provided")
         
-        # Step 2: Generate repo.md using repo2txt or fallback
-        repo_md_path, stats = self._generate_repo_md(
-            local_repo_path,
-            repo_dir / "repo.md",
-            request.include_patterns,
-            request.exclude_patterns
-        )
-        
-        # Step 3: Generate tree.json
-        tree_json_path = self._generate_tree_json(
-            local_repo_path, 
-            repo_dir / "tree.json"
-        )
+        # An unchanged commit ingested with the same patterns reuses the
+        # earlier repo.md/tree.json instead of re-reading every file
+        output_key = self._output_cache_key(request, local_repo_path) if request.source.url else None
+        cached = self._copy_cached_output(output_key, repo_dir)
+        if cached is not None:
+            repo_md_path, tree_json_path, stats = cached
+        else:
+            # Step 2: Generate repo.md using repo2txt or fallback
+            repo_md_path, stats = self._generate_repo_md(
+                local_repo_path,
+                repo_dir / "repo.md",
+                request.include_patterns,
+                request.exclude_patterns
+            )
+            
+            # Step 3: Generate tree.json
+            tree_json_path = self._generate_tree_json(
+                local_repo_path, 
+                repo_dir / "tree.json"
+            )
+            
+            if output_key is not None:
+                self._store_cached(self._output_cache, output_key, (repo_dir, stats))
         
         # Step 4: Generate content signature for verification
         signature = self._generate_signature(local_repo_path, stats)
@@ -110,7 +193,10 @@ class IngestService:
     
     def _clone_repository(self, url: str, target_dir: Path) -> Path:
         """
-        Clone a git repository with shallow clone (depth=1)
+        Clone only the default branch tip (depth=1, single branch, no tags)
+        
+        Ingestion only reads the working tree at HEAD, so other branches,
+        tags and history are never downloaded.
         
         Args:
             url: Git repository URL
@@ -127,13 +213,21 @@ class IngestService:
                 "GitPython not available. Install with: pip install gitpython"
             )
         
+        # Re-ingesting the same URL copies the earlier clone instead of fetching
+        cache_key = self._normalize_repo_url(url)
+        cached_dir = self._get_cached_clone(cache_key, url)
+        if cached_dir is not None:
+            shutil.copytree(cached_dir, target_dir, symlinks=True, dirs_exist_ok=True)
+            return target_dir
+        
         try:
-            # Shallow clone with depth=1
+            # Shallow, single-branch clone without tags
             repo = git.Repo.clone_from(
                 url, 
                 target_dir, 
                 depth=1,
-                no_single_branch=False
+                single_branch=True,
+                no_tags=True
             )
             
             # Verify .git directory exists
@@ -141,6 +235,7 @@ class IngestService:
             if not git_dir.exists():
                 raise RuntimeError("Clone succeeded but .git directory not found")
             
+            self._store_cached(self._clone_cache, cache_key, (time.monotonic(), target_dir))
             return target_dir
             
         except git.GitCommandError as e:
@@ -148,6 +243,113 @@ class IngestService:
         except Exception as e:
             raise RuntimeError(f"Failed to clone repository: {str(e)}")
     
+    def _normalize_repo_url(self, url: str) -> str:
+        """
+        Normalize a repository URL for use as a clone cache key
+        
+        Treats "https://host/owner/repo", ".../repo/" and ".../repo.git" as the same repository.
+        """
+        normalized = url.strip().rstrip("/")
+        if normalized.endswith(".git"):
+            normalized = normalized[:-4]
+        return normalized
+    
+    def _get_cached_clone(self, cache_key: str, url: str) -> Optional[Path]:
+        """
+        Return a previous clone of the URL if it is still current, else None
+        
+        Within CLONE_CACHE_TTL the clone is reused as-is. After that it is
+        revalidated with `git ls-remote` (a few hundred bytes instead of a
+        full fetch) and reused if the remote HEAD has not moved.
+        """
+        cached = self._clone_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        verified_at, cached_dir = cached
+        if not (cached_dir / ".git").exists():
+            # Ingest directory was removed
+            self._drop_cached(self._clone_cache, cache_key)
+            return None
+        
+        if time.monotonic() - verified_at < CLONE_CACHE_TTL:
+            return cached_dir
+        
+        try:
+            remote_head = git.cmd.Git().ls_remote(url, "HEAD").split()[0]
+            local_head = git.Repo(cached_dir).head.commit.hexsha
+        except Exception:
+            # Cannot revalidate; fall back to a fresh clone
+            return None
+        
+        if remote_head != local_head:
+            return None
+        
+        self._store_cached(self._clone_cache, cache_key, (time.monotonic(), cached_dir))
+        return cached_dir
+    
+    def _output_cache_key(
+        self,
+        request: IngestRequest,
+        repo_path: Path
+    ) -> Optional[OutputCacheKey]:
+        """
+        Key an ingest's outputs by the commit and patterns that produced them
+        
+        Returns:
+            Cache key, or None if the checkout's HEAD cannot be read
+        """
+        try:
+            head = git.Repo(repo_path).head.commit.hexsha
+        except Exception:
+            return None
+        
+        return (
+            self._normalize_repo_url(str(request.source.url)),
+            head,
+            tuple(request.include_patterns),
+            tuple(request.exclude_patterns)
+        )
+    
+    def _copy_cached_output(
+        self,
+        output_key: Optional[OutputCacheKey],
+        repo_dir: Path
+    ) -> Optional[Tuple[Path, Path, Dict]]:
+        """
+        Copy repo.md and tree.json of an earlier ingest of the same commit
+        
+        The "Generated:" line of the copied repo.md is set to now, so it
+        dates this ingest rather than the one it was copied from.
+        
+        Args:
+            output_key: Key from _output_cache_key (None = not cacheable)
+            repo_dir: Ingest directory of the current run
+            
+        Returns:
+            Tuple of (repo_md_path, tree_json_path, stats), or None on a miss
+        """
+        cached = self._output_cache.get(output_key) if output_key is not None else None
+        if cached is None:
+            return None
+        
+        cached_dir, stats = cached
+        try:
+            repo_md_path = repo_dir / "repo.md"
+            with open(cached_dir / "repo.md", 'rb') as source, open(repo_md_path, 'wb') as target:
+                for line in itertools.islice(source, REPO_MD_HEADER_LINES):
+                    if line.startswith(b"Generated: "):
+                        line = f"Generated: {datetime.utcnow().isoformat()}\n".encode()
+                    target.write(line)
+                shutil.copyfileobj(source, target)
+            tree_json_path = Path(shutil.copyfile(cached_dir / "tree.json", repo_dir / "tree.json"))
+        except OSError:
+            # Earlier ingest directory was removed
+            self._drop_cached(self._output_cache, output_key)
+            return None
+        
+        return repo_md_path, tree_json_path, stats
+    
     def _generate_repo_md(
         self,
         repo_path: Path,
@@ -231,25 +433,9 @@ class IngestService:
             md_file.write(f"Generated: {datetime.utcnow().isoformat()}\n\n")
             md_file.write("---\n\n")
             
-            # Process all files
-            for file_path in sorted(repo_path.rglob('*')):
-                if not file_path.is_file():
-                    continue
-                
-                # Get relative path
-                try:
-                    rel_path = file_path.relative_to(repo_path)
-                except ValueError:
-                    continue
-                
-                # Check exclusions
-                if any(fnmatch(str(rel_path), pattern) for pattern in exclude_patterns):
-                    continue
-                
-                # Check inclusions (if patterns specified)
-                if include_patterns:
-                    if not any(fnmatch(file_path.name, pattern) for pattern in include_patterns):
-                        continue
+            # Process all files (streamed; never collected into a list)
+            for file_path in self.iter_files(repo_path, include_patterns, exclude_patterns):
+                rel_path = file_path.relative_to(repo_path)
                 
                 # Get file extension for language stats
                 ext = file_path.suffix or ".txt"
@@ -286,6 +472,159 @@ class IngestService:
         
         return output_path, stats
     
+    def iter_files(
+        self,
+        repo_path: Path,
+        include_patterns: Optional[List[str]] = None,
+        exclude_patterns: Optional[List[str]] = None
+    ) -> Iterator[Path]:
+        """
+        Lazily yield files in a repository that pass the include/exclude filters
+        
+        Git checkouts are listed with `git ls-files`, which honors .gitignore
+        and never descends into .git. Other directories are walked with
+        os.walk, pruning directories that an exclude pattern already covers
+        (e.g. "node_modules/*").
+        
+        Args:
+            repo_path: Path to repository
+            include_patterns: File name patterns to include (empty = all)
+            exclude_patterns: Relative path patterns to exclude
+            
+        Yields:
+            Absolute paths of matching files
+        """
+        exclude_patterns = exclude_patterns or []
+        excluded = _compile_globs(tuple(exclude_patterns)) if exclude_patterns else None
+        included = _compile_globs(tuple(include_patterns)) if include_patterns else None
+        normcase = os.path.normcase
+        
+        if (repo_path / ".git").exists():
+            rel_paths = self._iter_git_files(repo_path, exclude_patterns)
+        else:
+            rel_paths = self._walk_files(repo_path, exclude_patterns)
+        
+        for rel_path in rel_paths:
+            # Check exclusions
+            if excluded and excluded(normcase(rel_path)):
+                continue
+            
+            # Check inclusions (if patterns specified)
+            file_path = repo_path / rel_path
+            if included and not included(normcase(file_path.name)):
+                continue
+            
+            if file_path.is_file():
+                yield file_path
+    
+    def _iter_git_files(self, repo_path: Path, exclude_patterns: List[str]) -> Iterator[str]:
+        """
+        Stream relative paths from `git ls-files` (tracked + untracked, not ignored)
+        
+        Falls back to a directory walk if git is unavailable or fails before
+        listing anything.
+        """
+        try:
+            process = subprocess.Popen(
+                ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                cwd=repo_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                shell=False  # CRITICAL: Never use shell=True
+            )
+        except OSError:
+            yield from self._walk_files(repo_path, exclude_patterns)
+            return
+        
+        listed_any = False
+        pending = b""
+        try:
+            for chunk in iter(lambda: process.stdout.read(65536), b""):
+                *entries, pending = (pending + chunk).split(b"\0")
+                for entry in entries:
+                    listed_any = True
+                    yield os.fsdecode(entry).replace("/", os.sep)
+            process.wait(timeout=GIT_LS_FILES_TIMEOUT)
+        finally:
+            # Consumer stopped early (or timed out): don't leave git running
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+        
+        if process.returncode != 0 and not listed_any:
+            yield from self._walk_files(repo_path, exclude_patterns)
+    
+    def _walk_files(self, repo_path: Path, exclude_patterns: List[str]) -> Iterator[str]:
+        """
+        Yield relative file paths with os.walk, skipping excluded directories
+        
+        A directory is pruned only for patterns ending in "*" that match
+        "<dir>/": every path below it would match the same pattern.
+        """
+        dir_patterns = tuple(pattern for pattern in exclude_patterns if pattern.endswith("*"))
+        pruned = _compile_globs(dir_patterns) if dir_patterns else None
+        
+        for root, dirs, files in os.walk(repo_path):
+            rel_root = os.path.relpath(root, repo_path)
+            prefix = "" if rel_root == os.curdir else rel_root + os.sep
+            
+            dirs[:] = sorted(
+                d for d in dirs
+                if not (pruned and pruned(os.path.normcase(prefix + d + os.sep)))
+            )
+            for name in sorted(files):
+                yield prefix + name
+    
+    def get_repo_path(self, repo_id: str) -> Path:
+        """
+        Get the path to the ingested source of a repository
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            Path to the source directory (may not exist if not ingested)
+        """
+        return self.ingest_dir / repo_id / "source"
+    
+    def get_file_structure(self, repo_id: str, limit: int = MAX_STRUCTURE_FILES) -> List[str]:
+        """
+        List up to `limit` relative file paths of an ingested repository
+        
+        Only the first `limit` files are ever read from the lazy iterator.
+        Every ingest gets a new repo_id, so the listing is remembered and
+        repeated plan steps for the same repository skip the walk.
+        
+        Args:
+            repo_id: Repository ID
+            limit: Maximum number of paths to return
+            
+        Returns:
+            Relative file paths (empty if the repository is not ingested)
+        """
+        repo_path = self.get_repo_path(repo_id)
+        if not repo_path.is_dir():
+            with self._structure_cache_lock:
+                self._structure_cache.pop((repo_id, limit), None)
+            return []
+        
+        cache_key = (repo_id, limit)
+        structure = self._structure_cache.get(cache_key)
+        if structure is None:
+            files = self.iter_files(repo_path)
+            structure = [
+                file_path.relative_to(repo_path).as_posix()
+                for file_path in itertools.islice(files, limit)
+            ]
+            with self._structure_cache_lock:
+                if len(self._structure_cache) >= STRUCTURE_CACHE_SIZE:
+                    # Evict the oldest listing (dicts keep insertion order)
+                    del self._structure_cache[next(iter(self._structure_cache))]
+                self._structure_cache[cache_key] = structure
+        
+        return list(structure)
+    
     def _read_file_safe(self, file_path: Path) -> Tuple[Optional[str], bool]:
         """
         Read file with encoding fallback and size limits
@@ -297,35 +636,34 @@ class IngestService:
             Tuple of (content or None if binary, was_truncated)
         """
         try:
-            # Check file size
-            file_size = file_path.stat().st_size
-            was_truncated = file_size > MAX_BYTES_PER_FILE
-            
-            # Read with size limit
+            # Read with size limit; one extra byte tells us whether the file
+            # is longer, so no separate stat call is needed
             with open(file_path, 'rb') as f:
-                raw_bytes = f.read(MAX_BYTES_PER_FILE)
+                raw_bytes = f.read(MAX_BYTES_PER_FILE + 1)
+            was_truncated = len(raw_bytes) > MAX_BYTES_PER_FILE
+            raw_bytes = raw_bytes[:MAX_BYTES_PER_FILE]
             
-            # Try UTF-8 first
+            # Try UTF-8 first (a character cut at the limit is dropped rather
+            # than sending the whole file down the Latin-1 path)
             try:
-                content = raw_bytes.decode('utf-8')
+                content = codecs.getincrementaldecoder('utf-8')().decode(
+                    raw_bytes, final=not was_truncated
+                )
                 return content, was_truncated
             except UnicodeDecodeError:
                 pass
             
             # Fallback to Latin-1 (never fails)
-            try:
-                content = raw_bytes.decode('latin-1')
-                # Check if it looks like text (not binary)
-                if self._is_text_content(content):
-                    return content, was_truncated
-            except:
-                pass
+            content = raw_bytes.decode('latin-1')
+            # Check if it looks like text (not binary)
+            if self._is_text_content(content):
+                return content, was_truncated
             
             # Binary file
             return None, False
             
-        except Exception:
-            # Any error - treat as binary
+        except OSError:
+            # Unreadable file - treat as binary
             return None, False
     
     def _is_text_content(self, content: str) -> bool:
@@ -361,33 +699,42 @@ class IngestService:
         Returns:
             Path to generated tree.json
         """
-        def build_tree(path: Path) -> Dict:
-            """Recursively build tree structure"""
-            if path.is_file():
-                return {
-                    "type": "file",
-                    "name": path.name,
-                    "size": path.stat().st_size
-                }
-            
+        def build_tree(path: str, name: str) -> Dict:
+            """Recursively build tree structure (one scandir per directory)"""
+            # DirEntry carries the file type from the directory listing, so
+            # only files are stat-ed (for their size), each exactly once
             children = []
             try:
-                for child in sorted(path.iterdir()):
-                    # Skip hidden files/directories
-                    if child.name.startswith('.'):
-                        continue
-                    children.append(build_tree(child))
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=_entry_name)
             except PermissionError:
                 # Skip directories we can't read
-                pass
+                entries = []
+            
+            for entry in entries:
+                # Skip hidden files/directories
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_file():
+                    children.append({
+                        "type": "file",
+                        "name": entry.name,
+                        "size": entry.stat().st_size
+                    })
+                else:
+                    children.append(build_tree(entry.path, entry.name))
             
             return {
                 "type": "directory",
-                "name": path.name,
+                "name": name,
                 "children": children
             }
         
-        tree = build_tree(repo_path)
+        if repo_path.is_file():
+            # Single-file local source
+            tree = {"type": "file", "name": repo_path.name, "size": repo_path.stat().st_size}
+        else:
+            tree = build_tree(str(repo_path), repo_path.name)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(tree, f, indent=2)
@@ -413,34 +760,28 @@ class IngestService:
         """
         stats = {"file_count": 0, "total_lines": 0, "languages": {}, "total_size_bytes": 0}
         
-        for file_path in repo_path.rglob('*'):
-            if not file_path.is_file():
-                continue
-            
-            try:
-                rel_path = file_path.relative_to(repo_path)
-            except ValueError:
-                continue
-            
-            # Check exclusions
-            if any(fnmatch(str(rel_path), pattern) for pattern in exclude_patterns):
-                continue
-            
-            # Check inclusions
-            if include_patterns:
-                if not any(fnmatch(file_path.name, pattern) for pattern in include_patterns):
-                    continue
-            
+        for file_path in self.iter_files(repo_path, include_patterns, exclude_patterns):
             stats["file_count"] += 1
             ext = file_path.suffix or ".txt"
             stats["languages"][ext] = stats["languages"].get(ext, 0) + 1
             
-            # Try to count lines
+            # Count line endings in raw 1MB blocks (C-level bytes.count, no
+            # decode); \n, \r\n and a lone \r each end a line, as in text mode
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = sum(1 for _ in f)
-                    stats["total_lines"] += lines
-            except:
+                with open(file_path, 'rb') as f:
+                    last_block = b""
+                    for block in iter(lambda: f.read(LINE_COUNT_BLOCK_SIZE), b""):
+                        stats["total_lines"] += block.count(b"\n")
+                        carriage_returns = block.count(b"\r")
+                        if carriage_returns:
+                            stats["total_lines"] += carriage_returns - block.count(b"\r\n")
+                        if block.startswith(b"\n") and last_block.endswith(b"\r"):
+                            stats["total_lines"] -= 1  # \r\n split across blocks
+                        last_block = block
+                    if last_block and not last_block.endswith((b"\n", b"\r")):
+                        stats["total_lines"] += 1  # Unterminated last line
+            except OSError:
+                # Unreadable (removed, permissions); still counted as a file
                 pass
         
         return stats
@@ -469,21 +810,36 @@ class IngestService:
         
         return hasher.hexdigest()
     
-    def get_repo_content(self, repo_id: str) -> str:
+    def get_repo_md_path(self, repo_id: str) -> Path:
         """
-        Get the repo.md content for a repository
+        Get the path to the repo.md file for a repository
         
         Args:
             repo_id: Repository ID
             
         Returns:
-            Content of repo.md
+            Path to repo.md
             
         Raises:
             FileNotFoundError: If repository not found
         """
         repo_md_path = self.ingest_dir / repo_id / "repo.md"
-        if not repo_md_path.exists():
+        if not repo_md_path.is_file():
             raise FileNotFoundError(f"Repository {repo_id} not found")
         
-        return repo_md_path.read_text(encoding='utf-8')
+        return repo_md_path
+    
+    def get_repo_content(self, repo_id: str) -> str:
+        """
+        Get the repo.md content for a repository
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            Content of repo.md
+            
+        Raises:
+            FileNotFoundError: If repository not found
+        """
+        return self.get_repo_md_path(repo_id).read_text(encoding='utf-8')
@@ -5,21 +5,43 @@ Coordinates multi-step analysis workflows with plan approval
 
 import json
 import hmac
+import os
 import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import logging
 
+import orjson
+
 from config import settings
 from models.requests import OrchestratorRequest
-from services.ingest_service import IngestService
-from services.gemini_service import GeminiService
+from services.ingest_service import IngestService, MAX_STRUCTURE_FILES
+from services.gemini_service import GeminiService, get_gemini_service
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+PLAN_CACHE_SIZE = 256  # Plan files kept in memory for repeated GET/execute polls
+MAX_EVIDENCE_FILE_BYTES = 100 * 1024  # Files this large are not sent to Gemini
+MAX_EVIDENCE_WORKERS = 4  # Threads for reading a plan's evidence files
+MAX_VERIFY_WORKERS = 8  # Threads for verify_approvals (plan reads and large HMACs release the GIL)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _read_plan_file(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read a plan file's bytes
+    
+    mtime_ns/size are part of the cache key, so a rewritten plan (e.g. after
+    execution) is read again while unchanged plans are served from memory.
+    """
+    with open(path, 'rb') as f:
+        return f.read()
+
 
 class OrchestratorService:
     """
@@ -35,7 +57,19 @@ class OrchestratorService:
         
         # Initialize services
         self.ingest_service = IngestService()
-        self.gemini_service = GeminiService()
+        self.gemini_service: GeminiService = get_gemini_service()
+    
+    @property
+    def secret_key(self) -> str:
+        """HMAC key used to verify plan approvals"""
+        return self._secret_key
+    
+    @secret_key.setter
+    def secret_key(self, value: str) -> None:
+        # Key the HMAC once; each signature copies this state instead of
+        # re-encoding and re-padding the key
+        self._secret_key = value
+        self._hmac_base = hmac.new(value.encode(), digestmod=hashlib.sha256)
     
     def create_analysis_plan(self, request: OrchestratorRequest) -> Dict[str, Any]:
         """
@@ -43,6 +77,15 @@ class OrchestratorService:
         
         Returns plan with actions list and plan_id for later execution
         """
+        return self.create_analysis_plan_json(request)[0]
+    
+    def create_analysis_plan_json(self, request: OrchestratorRequest) -> Tuple[Dict[str, Any], bytes]:
+        """
+        Create analysis plan like create_analysis_plan, also returning its stored bytes
+        
+        Returns:
+            Tuple of (plan, canonical JSON bytes written to the plan file)
+        """
         logger.info(f"Creating analysis plan for repo: {request.repo_id}")
         
         # Generate unique plan ID
@@ -66,10 +109,10 @@ class OrchestratorService:
         }
         
         # Persist plan to disk
-        self._persist_plan(plan)
+        raw = self._persist_plan(plan)
         
         logger.info(f"Plan created: {plan_id} with {len(plan['actions'])} actions")
-        return plan
+        return plan, raw
     
     def execute_plan(
         self,
@@ -82,29 +125,111 @@ class OrchestratorService:
         
         Verifies HMAC signature before execution
         """
+        plan = self.load_approved_plan(plan_id, approved_by, approval_signature)
+        
+        # Check if already executed
+        if plan["status"] == "completed":
+            logger.warning(f"Plan {plan_id} already executed")
+            return plan
+        
+        # Execute actions sequentially
+        logger.info(f"Executing {len(plan['actions'])} actions for plan {plan_id}")
+        results = self._execute_actions(plan["actions"], plan["request"])
+        
+        return self._complete_plan(plan, results)
+    
+    def execute_plan_stream(self, plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Execute an approved plan, yielding progress as each action finishes
+        
+        Args:
+            plan: Plan returned by load_approved_plan()
+            
+        Yields:
+            One {"type": "action", ...} event per action, then a final
+            {"type": "completed", "plan": ...} event with the persisted plan
+        """
+        if plan["status"] != "completed":
+            logger.info(f"Executing {len(plan['actions'])} actions for plan {plan['plan_id']}")
+            results = self._new_results(plan["actions"], plan["request"])
+            
+            for action_result in self._iter_action_results(plan["actions"]):
+                self._record_action_result(results, action_result)
+                yield {"type": "action", **action_result}
+            
+            plan = self._complete_plan(plan, results)
+        
+        yield {"type": "completed", "plan": plan}
+    
+    def load_approved_plan(
+        self,
+        plan_id: str,
+        approved_by: str,
+        approval_signature: str
+    ) -> Dict[str, Any]:
+        """
+        Load a plan and verify its approval signature
+        
+        Raises:
+            FileNotFoundError: If the plan does not exist
+            PermissionError: If the signature does not match
+        """
         logger.info(f"Executing plan {plan_id} approved by {approved_by}")
         
         # Load plan from disk
-        plan = self._load_plan(plan_id)
+        loaded = self._load_plan_bytes(plan_id)
         
-        if not plan:
+        if not loaded:
             raise FileNotFoundError(f"Plan {plan_id} not found")
+        plan, raw = loaded
         
-        # Verify approval signature
-        if not self._verify_signature(plan, approved_by, approval_signature):
+        if not self._verify_stored(raw, approved_by, approval_signature):
             logger.error(f"Invalid signature for plan {plan_id}")
             raise PermissionError("Invalid approval signature")
         
-        # Check if already executed
-        if plan["status"] == "completed":
-            logger.warning(f"Plan {plan_id} already executed")
-            return plan
+        return plan
+    
+    def verify_approvals(self, approvals: List[Tuple[str, str, str]]) -> List[bool]:
+        """
+        Check many (plan_id, approved_by, approval_signature) triples at once
         
-        # Execute actions sequentially
-        logger.info(f"Executing {len(plan['actions'])} actions for plan {plan_id}")
-        results = self._execute_actions(plan["actions"], plan["request"])
+        For batch callers such as audit replays; nothing is executed. Plans
+        are loaded and verified on a thread pool: file reads and OpenSSL
+        HMAC updates on large plans release the GIL.
         
-        # Update plan with results
+        Args:
+            approvals: (plan_id, approved_by, approval_signature) triples
+            
+        Returns:
+            One bool per triple, in order (False for missing plans)
+        """
+        def check(approval: Tuple[str, str, str]) -> bool:
+            plan_id, approved_by, approval_signature = approval
+            raw = self.get_plan_json(plan_id)
+            return raw is not None and self._verify_stored(raw, approved_by, approval_signature)
+        
+        if len(approvals) < 2:
+            return [check(approval) for approval in approvals]
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_VERIFY_WORKERS, len(approvals))) as pool:
+            return list(pool.map(check, approvals))
+    
+    def _verify_stored(self, raw: bytes, approved_by: str, signature: str) -> bool:
+        """
+        Verify a signature against a plan file's bytes
+        
+        Canonical files are hashed as stored; plans saved before canonical
+        persistence (indented JSON) are re-serialized. Canonical json.dumps
+        output is one line, so a newline marks the old format.
+        """
+        if b"\n" in raw:
+            return self._verify_signature(orjson.loads(raw), approved_by, signature)
+        return self._verify_canonical(raw, approved_by, signature)
+    
+    def _complete_plan(self, plan: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Mark plan as completed with its results and persist it
+        """
         plan["status"] = "completed"
         plan["executed_at"] = datetime.utcnow().isoformat() + "Z"
         plan["results"] = results
@@ -112,7 +237,7 @@ class OrchestratorService:
         # Persist updated plan
         self._persist_plan(plan)
         
-        logger.info(f"Plan {plan_id} execution completed")
+        logger.info(f"Plan {plan['plan_id']} execution completed")
         return plan
     
     def _generate_actions(self, request: OrchestratorRequest) -> List[Dict[str, Any]]:
@@ -212,7 +337,22 @@ class OrchestratorService:
         
         Returns aggregated results
         """
-        results = {
+        results = self._new_results(actions, request_data)
+        
+        for action_result in self._iter_action_results(actions):
+            self._record_action_result(results, action_result)
+        
+        return results
+    
+    def _new_results(
+        self,
+        actions: List[Dict[str, Any]],
+        request_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Create the empty aggregated results structure for a plan run
+        """
+        return {
             "repo_id": request_data["repo_id"],
             "analysis_type": request_data["analysis_type"],
             "summary": "Orchestrated analysis completed",
@@ -221,7 +361,26 @@ class OrchestratorService:
             "completed_actions": 0,
             "session_context": {}  # Store intermediate results
         }
-        
+    
+    def _record_action_result(
+        self,
+        results: Dict[str, Any],
+        action_result: Dict[str, Any]
+    ) -> None:
+        """
+        Add a single action result to the aggregated results
+        """
+        results["action_results"].append(action_result)
+        if action_result["status"] == "completed":
+            results["completed_actions"] += 1
+    
+    def _iter_action_results(
+        self,
+        actions: List[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Execute planned actions sequentially, yielding each result as it completes
+        """
         session_context = {}
         
         for action in actions:
@@ -231,32 +390,27 @@ class OrchestratorService:
                 # Execute action based on type
                 action_result = self._execute_single_action(action, session_context)
                 action["status"] = "completed"
-                results["action_results"].append({
+                yield {
                     "step": action["step"],
                     "action": action["action"],
                     "status": "completed",
                     "result": action_result
-                })
-                results["completed_actions"] += 1
+                }
                 
             except Exception as e:
                 logger.error(f"Action {action['step']} failed: {str(e)}")
                 action["status"] = "failed"
-                results["action_results"].append({
+                yield {
                     "step": action["step"],
                     "action": action["action"],
                     "status": "failed",
                     "error": str(e)
-                })
+                }
                 # If critical step fails, might want to stop? 
                 # For now we continue or break based on design. 
                 # Let's break if it's a deep analysis step
                 if action["action"] in ["gemini_think", "gemini_analyze"]:
                     break
-        
-        return results
-        
-        return results
     
     def _execute_single_action(
             self, 
@@ -289,8 +443,8 @@ class OrchestratorService:
         
         elif action_type == "run_codeql":
             # Call CodeQL service (Phase 2)
-            from services.codeql_service import CodeQLService
-            codeql = CodeQLService()
+            from services.codeql_service import get_codeql_service
+            codeql = get_codeql_service()
             # This would run analysis
             # For brevity in this file we return a placeholder or call real service if completely ready
             # Assuming real call:
@@ -302,9 +456,10 @@ class OrchestratorService:
             
             # Application of "Context-Aware" logic:
             # 1. Get file structure from IngestService
-            repo_path = self.ingest_service.get_repo_path(params['repo_id'])
             file_structure = self.ingest_service.get_file_structure(params['repo_id'])
             
+            logger.info(f"File structure: {len(file_structure)} files (limit {MAX_STRUCTURE_FILES})")
+            
             # if file structure is empty/error, we might fallback or fail
             context_str = "\n".join(file_structure) if file_structure else "No files found"
             
@@ -331,25 +486,7 @@ class OrchestratorService:
             files_to_read = plan.files_to_read if hasattr(plan, 'files_to_read') else plan.get('files_to_read', [])
             repo_path = self.ingest_service.get_repo_path(params['repo_id'])
             
-            file_contents = {}
-            for file_item in files_to_read:
-                # file_item is FileToRead object or dict
-                f_path = file_item.path if hasattr(file_item, 'path') else file_item.get('path')
-                full_path = repo_path / f_path
-                try:
-                    # Safety check: ensure path is within repo
-                    if not str(full_path.resolve()).startswith(str(repo_path.resolve())):
-                        logger.warning(f"Skipping file outside repo: {f_path}")
-                        continue
-                        
-                    if full_path.exists() and full_path.is_file():
-                        # Read with size limit (e.g. 100KB)
-                        if full_path.stat().st_size < 100 * 1024:
-                            file_contents[f_path] = full_path.read_text(encoding='utf-8', errors='replace')
-                        else:
-                            file_contents[f_path] = "(File too large)"
-                except Exception as e:
-                    logger.warning(f"Failed to read {f_path}: {e}")
+            file_contents = self._read_evidence_files(repo_path, files_to_read)
             
             # 2. Call Gemini Analysis
             result = self.gemini_service.perform_analysis(params['query'], plan, file_contents)
@@ -365,6 +502,61 @@ class OrchestratorService:
         else:
             raise ValueError(f"Unknown action type: {action_type}")
     
+    def _read_evidence_files(self, repo_path: Path, files_to_read: List[Any]) -> Dict[str, str]:
+        """
+        Read the plan's evidence files concurrently
+        
+        Each read is a blocking open/read, so on a cold cache they are
+        overlapped on a small pool instead of paid one after another.
+        
+        Args:
+            repo_path: Ingested source directory
+            files_to_read: FileToRead objects or dicts with a 'path' key
+            
+        Returns:
+            Mapping of relative path -> content, in plan order (unreadable
+            files and files outside the repo are skipped)
+        """
+        repo_root = str(repo_path.resolve())
+        
+        def read_one(file_item: Any) -> Tuple[str, Optional[str]]:
+            # file_item is FileToRead object or dict
+            f_path = file_item.path if hasattr(file_item, 'path') else file_item.get('path')
+            full_path = repo_path / f_path
+            try:
+                # Safety check: ensure path is within repo
+                if not str(full_path.resolve()).startswith(repo_root):
+                    logger.warning(f"Skipping file outside repo: {f_path}")
+                    return f_path, None
+                
+                if full_path.is_file():
+                    return f_path, self._read_evidence_file(full_path)
+            except Exception as e:
+                logger.warning(f"Failed to read {f_path}: {e}")
+            return f_path, None
+        
+        if len(files_to_read) < 2:
+            results = [read_one(file_item) for file_item in files_to_read]
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_EVIDENCE_WORKERS, len(files_to_read))) as pool:
+                results = list(pool.map(read_one, files_to_read))
+        
+        return {f_path: content for f_path, content in results if content is not None}
+    
+    def _read_evidence_file(self, path: Path) -> str:
+        """
+        Read a file for Gemini analysis, bounded by MAX_EVIDENCE_FILE_BYTES
+        
+        Reads at most the limit instead of stat-ing and then loading the whole
+        file, so an oversized file never gets materialized.
+        """
+        with open(path, 'rb') as f:
+            data = f.read(MAX_EVIDENCE_FILE_BYTES)
+        
+        if len(data) >= MAX_EVIDENCE_FILE_BYTES:
+            return "(File too large)"
+        return data.decode('utf-8', errors='replace')
+    
     def _verify_signature(
         self,
         plan: Dict[str, Any],
@@ -376,14 +568,18 @@ class OrchestratorService:
         
         Signature = HMAC(plan_json + approved_by, secret_key)
         """
-        # Generate expected signature
-        plan_json = json.dumps(plan, sort_keys=True)
-        message = f"{plan_json}:{approved_by}"
-        expected_signature = hmac.new(
-            self.secret_key.encode(),
-            message.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        return self._verify_canonical(self._canonical_plan_bytes(plan), approved_by, signature)
+    
+    def _verify_canonical(
+        self,
+        canonical: bytes,
+        approved_by: str,
+        signature: str
+    ) -> bool:
+        """
+        Verify a signature against already-canonicalized plan bytes
+        """
+        expected_signature = self._sign(canonical, approved_by)
         
         # Compare signatures (constant-time comparison)
         return hmac.compare_digest(signature, expected_signature)
@@ -398,37 +594,91 @@ class OrchestratorService:
         
         In production, clients generate their own signatures
         """
-        plan_json = json.dumps(plan, sort_keys=True)
-        message = f"{plan_json}:{approved_by}"
-        signature = hmac.new(
-            self.secret_key.encode(),
-            message.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
+        return self._sign(self._canonical_plan_bytes(plan), approved_by)
+    
+    def _sign(self, canonical: bytes, approved_by: str) -> str:
+        """
+        HMAC-SHA256 over b"<canonical plan json>:<approved_by>"
+        
+        Copies the pre-keyed base rather than calling hmac.digest(): the
+        one-shot form re-derives the key pads and needs the message
+        concatenated into one buffer, which measured slower at every plan size.
+        """
+        mac = self._hmac_base.copy()
+        mac.update(canonical)
+        mac.update(b":")
+        mac.update(approved_by.encode())
+        return mac.hexdigest()
+    
+    def _canonical_plan_bytes(self, plan: Dict[str, Any]) -> bytes:
+        """
+        Canonical form clients sign: json.dumps(plan, sort_keys=True)
+        """
+        return json.dumps(plan, sort_keys=True).encode()
     
-    def _persist_plan(self, plan: Dict[str, Any]) -> None:
+    def _persist_plan(self, plan: Dict[str, Any]) -> bytes:
         """
         Save plan to disk for audit trail
+        
+        Written in canonical form (the exact bytes clients sign), so
+        verification can hash the file contents without re-serializing.
+        The bytes go to a temp file that is renamed over the plan, so a
+        concurrent reader never sees a half-written plan.
+        
+        Returns:
+            The canonical bytes written
         """
         plan_file = self.plans_dir / f"{plan['plan_id']}.json"
+        tmp_file = plan_file.with_name(f"{plan_file.name}.{uuid.uuid4().hex}.tmp")
+        
+        raw = self._canonical_plan_bytes(plan)
         
-        with open(plan_file, 'w') as f:
-            json.dump(plan, f, indent=2)
+        try:
+            tmp_file.write_bytes(raw)
+            os.replace(tmp_file, plan_file)
+        except OSError:
+            tmp_file.unlink(missing_ok=True)
+            raise
         
         logger.info(f"Plan persisted: {plan_file}")
+        return raw
     
     def _load_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
         """
         Load plan from disk
         """
-        plan_file = self.plans_dir / f"{plan_id}.json"
+        loaded = self._load_plan_bytes(plan_id)
+        return loaded[0] if loaded else None
+    
+    def _load_plan_bytes(self, plan_id: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """
+        Load plan from disk along with the raw file bytes
+        """
+        raw = self.get_plan_json(plan_id)
         
-        if not plan_file.exists():
+        if raw is None:
             return None
         
-        with open(plan_file, 'r') as f:
-            plan = json.load(f)
+        plan = orjson.loads(raw)
         
         logger.info(f"Plan loaded: {plan_id}")
-        return plan
+        return plan, raw
+    
+    def get_plan_json(self, plan_id: str) -> Optional[bytes]:
+        """
+        Stored plan as JSON bytes, ready to send without re-encoding
+        
+        Args:
+            plan_id: Plan ID
+            
+        Returns:
+            Plan file contents, or None if the plan does not exist
+        """
+        plan_file = self.plans_dir / f"{plan_id}.json"
+        
+        try:
+            stat = plan_file.stat()
+        except FileNotFoundError:
+            return None
+        
+        return _read_plan_file(str(plan_file), stat.st_mtime_ns, stat.st_size)
@@ -6,6 +6,10 @@ Implements CLI wrapper with JSON adapter for deterministic parsing
 import subprocess
 import json
 import re
+import threading
+import time
+from collections import OrderedDict
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
@@ -20,6 +24,12 @@ INDEX_TIMEOUT = 60  # 60 seconds for indexing
 SEARCH_TIMEOUT = 30  # 30 seconds for search
 MAX_RESULTS = 50  # Maximum results to return
 MAX_SNIPPET_LENGTH = 500  # Maximum snippet length in characters
+SEARCH_CACHE_TTL = 30  # Seconds a search result is reused for the same repo/query/limit
+SEARCH_CACHE_SIZE = 256  # Search results kept in memory (least recently used evicted)
+
+# SeaGOAT grep-line output: filepath:linenum:content
+GREP_LINE_RE = re.compile(r'^([^:]+):(\d+):(.*)$')
+_line_number = itemgetter(0)
 
 
 class SearchService:
@@ -28,6 +38,10 @@ class SearchService:
     def __init__(self):
         self.ingest_dir = Path(settings.INGEST_DIR)
         self.ingest_dir.mkdir(parents=True, exist_ok=True)
+        
+        # (repo_id, query, limit) -> (monotonic time stored, response)
+        self._search_cache: "OrderedDict[Tuple[str, str, int], Tuple[float, SemanticSearchResponse]]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()  # search runs in worker threads
     
     def index_repository(self, repo_id: str) -> Dict:
         """
@@ -68,6 +82,9 @@ class SearchService:
             # Calculate indexing time
             index_time = (datetime.utcnow() - start_time).total_seconds()
             
+            # Results cached before (or during) indexing may be incomplete
+            self._clear_search_cache(repo_id)
+            
             # Count files in repository for doc_count
             doc_count = sum(1 for _ in repo_source_dir.rglob('*') if _.is_file())
             
@@ -113,6 +130,12 @@ class SearchService:
                 f"Please ingest and index the repository first."
             )
         
+        # Agents and UIs repeat the same query; reuse a recent answer
+        cache_key = (request.repo_id, request.query, request.limit)
+        cached = self._get_cached_search(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # Execute SeaGOAT search
             result = subprocess.run(
@@ -130,13 +153,18 @@ class SearchService:
                 request.limit
             )
             
-            return SemanticSearchResponse(
+            # Inputs are already validated and results built below; skip re-validation
+            response = SemanticSearchResponse.model_construct(
                 repo_id=request.repo_id,
                 query=request.query,
                 results=search_results,
                 total_results=len(search_results)
             )
             
+            if result.returncode == 0:
+                self._store_cached_search(cache_key, response)
+            return response
+            
         except subprocess.TimeoutExpired:
             raise RuntimeError(
                 f"Search timeout exceeded ({SEARCH_TIMEOUT}s). "
@@ -145,6 +173,45 @@ class SearchService:
         except Exception as e:
             raise RuntimeError(f"Search failed: {str(e)}")
     
+    def _get_cached_search(self, cache_key: Tuple[str, str, int]) -> Optional[SemanticSearchResponse]:
+        """
+        Return a search response stored within SEARCH_CACHE_TTL, else None
+        """
+        with self._search_cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is None:
+                return None
+            
+            stored_at, response = cached
+            if time.monotonic() - stored_at >= SEARCH_CACHE_TTL:
+                del self._search_cache[cache_key]
+                return None
+            
+            self._search_cache.move_to_end(cache_key)
+            return response
+    
+    def _store_cached_search(
+        self,
+        cache_key: Tuple[str, str, int],
+        response: SemanticSearchResponse
+    ) -> None:
+        """
+        Remember a search response, evicting the least recently used beyond SEARCH_CACHE_SIZE
+        """
+        with self._search_cache_lock:
+            self._search_cache[cache_key] = (time.monotonic(), response)
+            self._search_cache.move_to_end(cache_key)
+            while len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+    
+    def _clear_search_cache(self, repo_id: str) -> None:
+        """
+        Drop cached search responses for one repository
+        """
+        with self._search_cache_lock:
+            for cache_key in [key for key in self._search_cache if key[0] == repo_id]:
+                del self._search_cache[cache_key]
+    
     def _parse_seagoat_output(
         self, 
         output: str, 
@@ -176,20 +243,16 @@ class SearchService:
         
         for line in lines:
             # Match grep-line format: filepath:linenum:content
-            match = re.match(r'^([^:]+):(\d+):(.*)$', line)
+            match = GREP_LINE_RE.match(line)
             
             if match:
-                file_path = match.group(1)
-                line_num = int(match.group(2))
-                content = match.group(3)
+                file_path, line_num, content = match.groups()
                 
                 if file_path not in file_results:
                     file_results[file_path] = []
                 
-                file_results[file_path].append({
-                    'line_number': line_num,
-                    'content': content
-                })
+                # (line_number, content) tuples: no per-line dict for every match
+                file_results[file_path].append((int(line_num), content))
         
         # Convert to SearchResult objects
         for file_path, file_lines in file_results.items():
@@ -197,10 +260,10 @@ class SearchService:
                 break
             
             # Sort by line number
-            file_lines.sort(key=lambda x: x['line_number'])
+            file_lines.sort(key=_line_number)
             
             # Create snippet from consecutive lines
-            snippet_lines = [fl['content'] for fl in file_lines[:5]]  # Max 5 lines
+            snippet_lines = [content for _, content in file_lines[:5]]  # Max 5 lines
             snippet = '\n'.join(snippet_lines)
             
             # Truncate snippet if too long
@@ -211,9 +274,10 @@ class SearchService:
             relevance_score = max(0.5, 1.0 - (len(results) * 0.05))
             
             # Get first line number
-            first_line = file_lines[0]['line_number']
+            first_line = file_lines[0][0]
             
-            results.append(SearchResult(
+            # Fields are constructed in-range (line >= 0, score in [0.5, 1.0])
+            results.append(SearchResult.model_construct(
                 file_path=file_path,
                 line_number=first_line,
                 code_snippet=snippet,
@@ -3,11 +3,19 @@ Test script to demonstrate API usage
 Run this to test all endpoints
 """
 
-import requests
+import httpx
 import json
 import time
 
 BASE_URL = "http://localhost:8000"
+REQUEST_TIMEOUT = 600  # Ingestion can take minutes; match the server's clone timeout
+
+# One pooled keep-alive client for the whole run (no TCP setup per request)
+client = httpx.Client(
+    base_url=BASE_URL,
+    timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+    limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)
+)
 
 
 def print_section(title):
@@ -20,7 +28,7 @@ def test_health():
     """Test health endpoint"""
     print_section("1. Health Check")
     
-    response = requests.get(f"{BASE_URL}/health")
+    response = client.get("/health")
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     
@@ -40,8 +48,8 @@ def test_ingest():
     
     print(f"Request: {json.dumps(payload, indent=2)}")
     
-    response = requests.post(
-        f"{BASE_URL}/api/ingest",
+    response = client.post(
+        "/api/ingest",
         json=payload
     )
     
@@ -62,8 +70,8 @@ def test_search(repo_id):
     
     print(f"Request: {json.dumps(payload, indent=2)}")
     
-    response = requests.post(
-        f"{BASE_URL}/api/search",
+    response = client.post(
+        "/api/search",
         json=payload
     )
     
@@ -88,8 +96,8 @@ def test_create_plan(repo_id):
     
     print(f"Request: {json.dumps(payload, indent=2)}")
     
-    response = requests.post(
-        f"{BASE_URL}/api/orchestrator/plan",
+    response = client.post(
+        "/api/orchestrator/plan",
         json=payload
     )
     
@@ -108,8 +116,8 @@ def test_get_plan(plan_id):
     """Test getting plan details"""
     print_section("5. Get Plan Details")
     
-    response = requests.get(
-        f"{BASE_URL}/api/orchestrator/plan/{plan_id}"
+    response = client.get(
+        f"/api/orchestrator/plan/{plan_id}"
     )
     
     print(f"Status: {response.status_code}")
@@ -126,7 +134,7 @@ def test_metrics():
     """Test metrics endpoint"""
     print_section("6. View Metrics")
     
-    response = requests.get(f"{BASE_URL}/metrics")
+    response = client.get("/metrics")
     
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
@@ -184,7 +192,7 @@ def main():
         print("  ✅ TEST SCRIPT COMPLETED")
         print("="*60 + "\n")
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("\n❌ ERROR: Cannot connect to server!")
         print("Make sure the server is running:")
         print("  uvicorn main:app --reload")
@@ -193,6 +201,8 @@ def main():
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        client.close()
 
 
 if __name__ == "__main__":
@@ -37,7 +37,17 @@ class TestHealthAndMetrics:
         assert "search" in services
         assert "codeql" in services
         assert "orchestrator" in services
-    
+
+    def test_health_reflects_refreshed_availability(self, monkeypatch):
+        """Test a CodeQL availability change shows up on the next /health"""
+        import main
+
+        monkeypatch.setattr(main.codeql_service, "codeql_available", True)
+        assert client.get("/health").json()["services"]["codeql"] == "available"
+
+        monkeypatch.setattr(main.codeql_service, "codeql_available", False)
+        assert client.get("/health").json()["services"]["codeql"] == "unavailable (CLI missing)"
+
     def test_metrics_endpoint(self):
         """Test metrics endpoint returns statistics"""
         response = client.get("/metrics")
@@ -92,6 +102,24 @@ class TestRequestIDTracking:
         id2 = response2.headers["X-Request-ID"]
         
         assert id1 != id2
+    
+    def test_request_ids_do_not_wrap(self, monkeypatch):
+        """Test the counter part of request IDs keeps growing past 6 hex digits"""
+        import itertools
+        from api import middleware
+
+        monkeypatch.setattr(middleware, "_request_counter", itertools.count(0xFFFFFF))
+        last_short = middleware.next_request_id()
+        first_long = middleware.next_request_id()
+
+        assert last_short.endswith("ffffff")
+        assert first_long == last_short[:10] + "1000000"  # req_ + prefix + counter
+    
+    def test_client_request_id_reused(self):
+        """Test a client-supplied X-Request-ID is echoed back"""
+        response = client.get("/health", headers={"X-Request-ID": "trace-abc-123"})
+        
+        assert response.headers["X-Request-ID"] == "trace-abc-123"
 
 
 class TestOrchestratorFlow:
@@ -114,7 +142,19 @@ class TestOrchestratorFlow:
         assert "actions" in plan
         assert len(plan["actions"]) > 0
         assert plan["executed_at"] is None
-    
+
+    def test_create_plan_returns_signable_bytes(self):
+        """Test the plan body is the canonical form clients sign"""
+        import json
+
+        response = client.post("/api/orchestrate/plan", json={
+            "repo_id": "test_bytes",
+            "analysis_type": "security"
+        })
+
+        assert response.status_code == 200
+        assert response.content == json.dumps(response.json(), sort_keys=True).encode()
+
     def test_get_plan(self):
         """Test retrieving a created plan"""
         # Create plan first
@@ -184,7 +224,77 @@ class TestOrchestratorFlow:
         result = exec_response.json()
         assert result["status"] == "completed"
         assert result["executed_at"] is not None
-    
+
+    def test_execute_plan_stream(self):
+        """Test streamed execution emits one NDJSON line per action, then the plan"""
+        import json
+        from services.orchestrator import OrchestratorService
+
+        # Create plan
+        create_response = client.post("/api/orchestrate/plan", json={
+            "repo_id": "test_stream",
+            "analysis_type": "security"
+        })
+        plan = create_response.json()
+
+        # Invalid signature is rejected before streaming starts
+        bad_response = client.post("/api/orchestrate/execute/stream", json={
+            "plan_id": plan["plan_id"],
+            "approved_by": "test@example.com",
+            "approval_signature": "invalid_signature"
+        })
+        assert bad_response.status_code == 403
+
+        approved_by = "test@example.com"
+        signature = OrchestratorService().generate_signature(plan, approved_by)
+
+        exec_response = client.post("/api/orchestrate/execute/stream", json={
+            "plan_id": plan["plan_id"],
+            "approved_by": approved_by,
+            "approval_signature": signature
+        })
+
+        assert exec_response.status_code == 200
+        assert exec_response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in exec_response.text.splitlines()]
+
+        assert [e["type"] for e in events] == ["action"] * len(plan["actions"]) + ["completed"]
+        assert events[-1]["plan"]["status"] == "completed"
+
+        # Results were persisted with the plan
+        stored = client.get(f"/api/orchestrate/plan/{plan['plan_id']}").json()
+        assert stored["status"] == "completed"
+        assert len(stored["results"]["action_results"]) == len(plan["actions"])
+
+    def test_execute_plan_stream_holds_slot_only_while_streaming(self):
+        """Test an unread stream holds no execution slot and a read one frees it"""
+        import asyncio
+        from unittest.mock import Mock
+        from api import orchestrator as orchestrator_api
+
+        service = Mock()
+        service.load_approved_plan.return_value = {"plan_id": "plan_x"}
+        service.execute_plan_stream.return_value = iter([{"type": "completed", "plan": {}}])
+        request = orchestrator_api.ExecutePlanRequest(
+            plan_id="plan_x", approved_by="a@example.com", approval_signature="sig"
+        )
+        semaphore = orchestrator_api._execution_semaphore
+        free_slots = semaphore._value
+
+        async def run():
+            # Client gone before the body starts: the generator never runs
+            await orchestrator_api.execute_plan_stream(request=request, service=service)
+            assert semaphore._value == free_slots
+
+            response = await orchestrator_api.execute_plan_stream(request=request, service=service)
+            body = response.body_iterator
+            await body.__anext__()
+            assert semaphore._value == free_slots - 1
+            await body.aclose()
+            assert semaphore._value == free_slots
+
+        asyncio.run(run())
+
     def test_create_plan_with_custom_instructions(self):
         """Test creating plan with custom instructions"""
         response = client.post("/api/orchestrate/plan", json={
@@ -77,6 +77,32 @@ class TestIngestEndpoints:
         data = response.json()
         assert "detail" in data
 
+    def test_get_repo_content_markdown_with_etag(self, tmp_path, monkeypatch):
+        """Test GET /api/ingest/{repo_id}?format=markdown streams the file with ETag"""
+        from api import ingest as ingest_api
+
+        repo_dir = tmp_path / "md123456"
+        repo_dir.mkdir()
+        (repo_dir / "repo.md").write_text("# Repository: demo\n", encoding="utf-8")
+        monkeypatch.setattr(ingest_api.ingest_service, "ingest_dir", tmp_path)
+
+        response = client.get("/api/ingest/md123456?format=markdown")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/markdown")
+        assert response.text == "# Repository: demo\n"
+        etag = response.headers["etag"]
+
+        # Re-request with the ETag returns 304 without a body
+        cached = client.get(
+            "/api/ingest/md123456",
+            headers={"Accept": "text/markdown", "If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+
+        # JSON mode remains the default
+        data = client.get("/api/ingest/md123456").json()
+        assert data == {"repo_id": "md123456", "content": "# Repository: demo\n"}
+
 
 class TestSearchEndpoints:
     """Test search API endpoints"""
@@ -86,6 +112,33 @@ class TestSearchEndpoints:
         response = client.post("/api/search/semantic", json={})
         assert response.status_code == 422  # Validation error
     
+    def test_semantic_search_malformed_json(self):
+        """Test malformed JSON bodies are rejected as body validation errors"""
+        response = client.post(
+            "/api/search/semantic",
+            content=b"{not json",
+            headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][0] == "body"
+
+        # The body schema is still documented
+        schema = client.get("/openapi.json").json()
+        body = schema["paths"]["/api/search/semantic"]["post"]["requestBody"]
+        assert "repo_id" in body["content"]["application/json"]["schema"]["properties"]
+
+    def test_semantic_search_validation_error_context(self):
+        """Test body validation errors keep the constraint context like FastAPI's own"""
+        response = client.post("/api/search/semantic", json={
+            "repo_id": "abc12345",
+            "query": "test",
+            "limit": 51
+        })
+        assert response.status_code == 422
+        error = response.json()["detail"][0]
+        assert error["loc"] == ["body", "limit"]
+        assert error["ctx"] == {"le": 50}
+
     def test_semantic_search_repo_not_found(self):
         """Test POST /api/search/semantic with non-existent repo"""
         response = client.post("/api/search/semantic", json={
@@ -98,6 +151,58 @@ class TestSearchEndpoints:
         data = response.json()
         assert "detail" in data
     
+    def test_semantic_search_uses_injected_service(self):
+        """Test the search service is injected via Depends and can be overridden"""
+        from unittest.mock import Mock
+        from api.search import get_search_service
+        from models.responses import SemanticSearchResponse
+
+        # The default provider hands out one shared instance
+        assert get_search_service() is get_search_service()
+
+        fake_service = Mock()
+        fake_service.search.return_value = SemanticSearchResponse(
+            repo_id="abc12345", query="auth", results=[], total_results=0
+        )
+        app.dependency_overrides[get_search_service] = lambda: fake_service
+        try:
+            response = client.post("/api/search/semantic", json={
+                "repo_id": "abc12345",
+                "query": "auth",
+                "limit": 5
+            })
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.json()["total_results"] == 0
+        fake_service.search.assert_called_once()
+
+    def test_concurrent_index_requests_share_one_job(self):
+        """Test concurrent index calls for the same repo run SeaGOAT once"""
+        import asyncio
+        import threading
+        from unittest.mock import Mock
+        from api.search import _index_once, _inflight_index
+
+        release = threading.Event()
+        fake_service = Mock()
+        fake_service.index_repository.side_effect = lambda repo_id: (
+            release.wait(5), {"repo_id": repo_id, "status": "indexed"}
+        )[1]
+
+        async def run():
+            calls = [asyncio.create_task(_index_once(fake_service, "abc12345")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*calls)
+
+        results = asyncio.run(run())
+
+        assert fake_service.index_repository.call_count == 1
+        assert all(r["status"] == "indexed" for r in results)
+        assert "abc12345" not in _inflight_index
+
     def test_index_repository_not_found(self):
         """Test POST /api/search/index/{repo_id} with non-existent repo"""
         response = client.post("/api/search/index/nonexistent123")
@@ -160,6 +265,29 @@ class TestErrorHandling:
             assert "exception" not in response_text
             assert "file \"" not in response_text  # Python traceback format
     
+    def test_http_error_map(self):
+        """Test mapped exceptions get their status/detail and others become a generic 500"""
+        import logging
+        from fastapi import HTTPException
+        from api.errors import HTTPErrorMap
+
+        errors = HTTPErrorMap(logging.getLogger("test"), "Lookup failed", {
+            LookupError: (404, "Not found", "Item '{item_id}' not found: {error}"),
+        })
+
+        # Subclasses map like their base
+        with pytest.raises(HTTPException) as mapped:
+            with errors(item_id="abc"):
+                raise KeyError("abc")
+        assert mapped.value.status_code == 404
+        assert mapped.value.detail == "Item 'abc' not found: 'abc'"
+
+        with pytest.raises(HTTPException) as unexpected:
+            with errors(item_id="abc"):
+                raise OSError("/secret/path")
+        assert unexpected.value.status_code == 500
+        assert unexpected.value.detail == "Lookup failed. Please try again."
+
     def test_validation_errors_are_clear(self):
         """Test that validation errors are clear"""
         response = client.post("/api/ingest", json={"invalid": "data"})
@@ -202,6 +330,26 @@ class TestOpenAPIDocumentation:
         response = client.get("/redoc")
         assert response.status_code == 200
     
+    def test_openapi_served_from_cached_bytes(self):
+        """Test the schema is encoded once and linked from the docs pages"""
+        import main
+
+        first = client.get("/openapi.json")
+        assert first.headers["content-type"] == "application/json"
+        assert first.content == main.openapi_bytes()
+        assert main.openapi_bytes() is main.openapi_bytes()
+
+        assert "/openapi.json" in client.get("/docs").text
+        assert "/openapi.json" in client.get("/redoc").text
+
+    def test_openapi_operations_have_one_tag(self):
+        """Test each operation is listed under a single docs section"""
+        schema = client.get("/openapi.json").json()
+
+        for path, operations in schema["paths"].items():
+            for method, operation in operations.items():
+                assert len(operation.get("tags", [])) == 1, f"{method.upper()} {path}"
+
     def test_openapi_has_examples(self):
         """Test OpenAPI schema has examples"""
         response = client.get("/openapi.json")
@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from main import app
 from models.responses import CodeQLResponse, CodeQLFinding, SeverityEnum
 
@@ -9,6 +9,10 @@ client = TestClient(app)
 @pytest.fixture
 def mock_service():
     with patch("api.analysis.codeql_service") as mock:
+        # Async entry point delegates to the sync mock so tests can configure either
+        mock.analyze_repository_async = AsyncMock(
+            side_effect=lambda request: mock.analyze_repository(request)
+        )
         yield mock
 
 def test_codeql_endpoint_success(mock_service):
@@ -100,7 +104,11 @@ def test_repository_not_found(mock_service):
     )
     
     assert response.status_code == 404
-    assert "Repository not found" in response.json()["detail"]["error"]
+    assert response.json()["detail"] == {
+        "error": "Repository not found",
+        "message": "Repo not found",
+        "hint": "Run POST /api/ingest first"
+    }
 
 def test_analysis_timeout(mock_service):
     """Test 504 when analysis times out"""
@@ -117,4 +125,4 @@ def test_analysis_timeout(mock_service):
     )
     
     assert response.status_code == 504
-    assert "Operation timeout" in response.json()["detail"]["error"]
+    assert response.json()["detail"] == {"error": "Operation timeout", "message": "Timed out"}
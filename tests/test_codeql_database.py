@@ -28,6 +28,10 @@ def test_validate_repo_id_format():
     # Invalid format - non-hex
     with pytest.raises(ValueError, match="Invalid repo_id format"):
         service._validate_repo_id("zzzzzzzz")
+    
+    # Invalid format - trailing newline (would slip past a "$" anchor)
+    with pytest.raises(ValueError, match="Invalid repo_id format"):
+        service._validate_repo_id("abc12345\n")
 
 def test_repo_not_ingested():
     """Test error when repo not ingested"""
@@ -80,6 +84,27 @@ def test_database_creation_failure():
         with pytest.raises(RuntimeError, match="Database creation failed"):
             service._create_database(Path("/source"), Path("/db"), "python")
 
+def test_database_creation_failure_bounds_stderr():
+    """Test a huge extractor log is cut to its tail, with paths scrubbed"""
+    from services.codeql_service import MAX_ERROR_OUTPUT_CHARS
+    
+    service = CodeQLService()
+    service.codeql_available = True
+    
+    mock_run = MagicMock()
+    mock_run.returncode = 1
+    mock_run.stderr = "x" * 100_000 + " fatal: cannot extract /source/app.py"
+    
+    with patch('subprocess.run', return_value=mock_run), \
+         patch('shutil.rmtree'):
+        
+        with pytest.raises(RuntimeError) as exc_info:
+            service._create_database(Path("/source"), Path("/db"), "python")
+    
+    message = str(exc_info.value)
+    assert message.endswith("fatal: cannot extract [SOURCE]/app.py")
+    assert len(message) < MAX_ERROR_OUTPUT_CHARS + 100
+
 def test_database_creation_missing_marker():
     """Test database creation returning 0 but missing marker file"""
     service = CodeQLService()
@@ -103,3 +128,14 @@ def test_database_creation_missing_marker():
             
         with pytest.raises(RuntimeError, match="Database creation appeared successful but marker"):
             service._create_database(Path("/source"), Path("/db"), "python")
+
+def test_database_paths_are_absolute():
+    """Test CodeQL commands only get absolute paths (same meaning via CLI server or subprocess)"""
+    service = CodeQLService()
+    service.codeql_available = True
+    
+    assert service.db_dir.is_absolute()
+    assert service.ingest_dir.is_absolute()
+    
+    with pytest.raises(AssertionError, match="absolute"):
+        service._create_database(Path("source"), Path("/db"), "python")
@@ -28,3 +28,30 @@ def test_codeql_timeout_handled():
     with patch('subprocess.run', side_effect=subprocess.TimeoutExpired('codeql', 10)):
         service = CodeQLService()
         assert service.codeql_available == False
+
+def test_refresh_availability_reprobes():
+    """Test availability is cached until explicitly refreshed"""
+    with patch('subprocess.run', side_effect=FileNotFoundError()):
+        service = CodeQLService()
+    assert service.codeql_available == False
+    
+    with patch('subprocess.run') as mock_run:
+        mock_run.return_value = MagicMock(
+            returncode=0,
+            stdout="CodeQL command-line toolchain release 2.15.0",
+            stderr=""
+        )
+        assert service.refresh_availability() == True
+        assert "2.15.0" in service.codeql_version
+
+def test_codeql_service_shared_across_callers():
+    """Test the process-wide service probes the CLI only once"""
+    from services.codeql_service import get_codeql_service
+    
+    with patch('subprocess.run', side_effect=FileNotFoundError()) as mock_run:
+        get_codeql_service.cache_clear()
+        try:
+            assert get_codeql_service() is get_codeql_service()
+            mock_run.assert_called_once()
+        finally:
+            get_codeql_service.cache_clear()
@@ -1,7 +1,7 @@
 import pytest
 import json
 from pathlib import Path
-from services.codeql_service import CodeQLService
+from services.codeql_service import CodeQLService, CODEQL_THREADS
 from unittest.mock import patch, MagicMock
 import subprocess
 
@@ -36,7 +36,7 @@ def test_run_queries_success(tmp_path):
     }
     sarif_file.write_text(json.dumps(sarif_content))
     
-    with patch('subprocess.run', return_value=mock_run):
+    with patch('subprocess.run', return_value=mock_run) as mock_subprocess:
         result = service._run_queries(
             Path("/fake-db"),
             "python",
@@ -45,7 +45,10 @@ def test_run_queries_success(tmp_path):
         )
         
         assert result["success"] is True
-        assert result["total_results"] == 2
+        assert result["output_path"] == str(sarif_file)
+        
+        # Queries use this run's share of the cores, not CodeQL's default of one
+        assert f"--threads={CODEQL_THREADS}" in mock_subprocess.call_args.args[0]
 
 def test_run_queries_failure():
     """Test query execution failure"""
@@ -0,0 +1,143 @@
+"""
+Unit tests for CodeQLCLIServer
+Uses a fake cli-server script that speaks the NUL-framed protocol
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services.codeql_server import CodeQLCLIServer, CodeQLCLIServerPool
+
+
+FAKE_SERVER = '''#!{python}
+import json, sys
+buf = b""
+while True:
+    byte = sys.stdin.buffer.read(1)
+    if not byte:
+        break
+    if byte != b"\\x00":
+        buf += byte
+        continue
+    args = json.loads(buf.decode())
+    buf = b""
+    if args == ["shutdown"]:
+        break
+    if args[0] == "fail":
+        sys.stderr.buffer.write(b"boom\\x01")
+        sys.stderr.flush()
+    elif args[0] == "hang":
+        import time
+        time.sleep(30)
+    elif args[0] == "sleep":
+        import os, time
+        time.sleep(float(args[1]))
+        sys.stdout.buffer.write(str(os.getpid()).encode() + b"\\x00")
+        sys.stdout.flush()
+    else:
+        sys.stdout.buffer.write(" ".join(args).encode() + b"\\x00")
+        sys.stdout.flush()
+'''
+
+
+@pytest.fixture
+def fake_codeql(tmp_path):
+    """Executable that behaves like `codeql execute cli-server`"""
+    if os.name == "nt":
+        pytest.skip("Fake cli-server script requires a POSIX shebang")
+
+    script = tmp_path / "codeql"
+    script.write_text(FAKE_SERVER.format(python=sys.executable))
+    script.chmod(0o755)
+    return str(script)
+
+
+class TestCodeQLCLIServer:
+    """Tests for the long-lived CodeQL CLI server wrapper"""
+
+    def test_runs_multiple_commands_on_one_process(self, fake_codeql):
+        """Test commands reuse the same server process"""
+        server = CodeQLCLIServer(fake_codeql)
+        try:
+            first = server.run(["version"], timeout=10)
+            pid = server._process.pid
+            second = server.run(["database", "create", "db"], timeout=10)
+
+            assert first.returncode == 0
+            assert first.stdout == "version"
+            assert second.stdout == "database create db"
+            assert server._process.pid == pid
+        finally:
+            server.shutdown()
+
+        assert not server.is_running()
+
+    def test_failure_sets_nonzero_returncode(self, fake_codeql):
+        """Test stderr failure marker is reported as a failed command"""
+        server = CodeQLCLIServer(fake_codeql)
+        try:
+            result = server.run(["fail"], timeout=10)
+
+            assert result.returncode == 1
+            assert result.stderr == "boom"
+        finally:
+            server.shutdown()
+
+    def test_timeout_kills_and_restarts_server(self, fake_codeql):
+        """Test a stuck command kills the server and the next call restarts it"""
+        server = CodeQLCLIServer(fake_codeql)
+        try:
+            with pytest.raises(subprocess.TimeoutExpired):
+                server.run(["hang"], timeout=0.5)
+
+            assert not server.is_running()
+
+            result = server.run(["version"], timeout=10)
+            assert result.stdout == "version"
+        finally:
+            server.shutdown()
+
+    def test_missing_binary_raises_oserror(self, tmp_path):
+        """Test a missing binary surfaces OSError so callers can fall back"""
+        server = CodeQLCLIServer(str(tmp_path / "does-not-exist"))
+
+        with pytest.raises(OSError):
+            server.run(["version"], timeout=1)
+
+
+class TestCodeQLCLIServerPool:
+    """Tests for the pool of CLI servers used by concurrent analyses"""
+
+    def test_sequential_commands_reuse_one_server(self, fake_codeql):
+        """Test a second server is not started without concurrency"""
+        pool = CodeQLCLIServerPool(fake_codeql, size=2)
+        try:
+            first = pool.run(["sleep", "0"], timeout=10)
+            second = pool.run(["sleep", "0"], timeout=10)
+
+            assert first.stdout == second.stdout
+            assert sum(server.is_running() for server in pool._servers) == 1
+        finally:
+            pool.shutdown()
+
+        assert not pool.is_running()
+
+    def test_concurrent_commands_run_on_separate_servers(self, fake_codeql):
+        """Test a long command does not block a concurrent one"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = CodeQLCLIServerPool(fake_codeql, size=2)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(
+                    lambda _: pool.run(["sleep", "1"], timeout=10), range(2)
+                ))
+
+            assert all(result.returncode == 0 for result in results)
+            assert results[0].stdout != results[1].stdout
+        finally:
+            pool.shutdown()
+
@@ -313,6 +313,98 @@ class TestCodeQLService:
         
         assert severity == SeverityEnum.MEDIUM
 
+    @patch('subprocess.run')
+    def test_analyze_repository_async_bounds_concurrency(self, mock_run):
+        """Test async entry point never runs more than the allowed pipelines at once"""
+        import asyncio
+        import threading
+        import time
+        from services.codeql_service import MAX_CONCURRENT_ANALYSES
+
+        mock_run.return_value = Mock(returncode=0, stdout="CodeQL 2.11.0", stderr="")
+        service = CodeQLService()
+
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def fake_analyze(request):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.05)
+            with lock:
+                state["running"] -= 1
+            return request.repo_id
+
+        service.analyze_repository = fake_analyze
+        request = CodeQLScanRequest(repo_id="test123", language="python")
+
+        async def run_all():
+            return await asyncio.gather(
+                *(service.analyze_repository_async(request) for _ in range(5))
+            )
+
+        results = asyncio.run(run_all())
+
+        assert results == ["test123"] * 5
+        assert state["peak"] <= MAX_CONCURRENT_ANALYSES
+
+    @patch('subprocess.run')
+    def test_analyze_repository_uses_result_cache(self, mock_run, monkeypatch, tmp_path):
+        """Test unchanged source reuses cached results; changed source rescans"""
+        mock_run.return_value = Mock(returncode=0, stdout="CodeQL 2.11.0", stderr="")
+        source_dir = tmp_path / "ingest" / "abcd1234" / "source"
+        source_dir.mkdir(parents=True)
+        (source_dir / "main.py").write_text("print('hello')\n")
+
+        service = CodeQLService()
+        monkeypatch.setattr(service, 'ingest_dir', tmp_path / "ingest")
+        monkeypatch.setattr(service, 'cache_dir', tmp_path / "cache")
+        service.cache_dir.mkdir()
+
+        finding = CodeQLFinding(
+            rule_id="py/test",
+            severity=SeverityEnum.HIGH,
+            message="msg",
+            file_path="main.py",
+            start_line=1,
+            end_line=1
+        )
+        create_db = Mock(return_value={"duration_seconds": 0.0})
+        monkeypatch.setattr(service, '_create_database', create_db)
+        monkeypatch.setattr(service, '_run_queries', Mock(return_value={"duration_seconds": 0.0}))
+        monkeypatch.setattr(service, '_parse_sarif', Mock(return_value=[finding]))
+
+        request = CodeQLScanRequest(repo_id="abcd1234", language="python")
+
+        first = service.analyze_repository(request)
+        second = service.analyze_repository(request)
+
+        assert create_db.call_count == 1
+        assert second.total_findings == first.total_findings == 1
+        assert second.findings[0].rule_id == "py/test"
+
+        # Each hit is its own object: one caller's changes do not leak
+        second.findings.clear()
+        assert service.analyze_repository(request).total_findings == len(first.findings) == 1
+
+        # A corrupted entry is a miss: it is deleted and the scan runs again
+        from services.codeql_service import _read_cached_response
+        cache_files = list(service.cache_dir.glob("*.json"))
+        assert len(cache_files) == 1
+        cache_files[0].write_text("{truncated", encoding='utf-8')
+        _read_cached_response.cache_clear()  # as after a restart
+        assert service.analyze_repository(request).total_findings == 1
+        assert create_db.call_count == 2
+        create_db.reset_mock()
+
+        # Modifying the source invalidates the cache
+        (source_dir / "main.py").write_text("print('changed, longer')\n")
+        service.analyze_repository(request)
+
+        assert create_db.call_count == 1
+        assert not list(service.cache_dir.glob("*.tmp"))
+
 
 class TestCodeQLServiceEdgeCases:
     """Edge case tests for CodeQLService"""
@@ -376,3 +468,32 @@ class TestCodeQLServiceEdgeCases:
         assert len(findings) == 1
         assert findings[0].rule_id == "unknown"
         assert findings[0].message == "No description available"
+    
+    @patch('subprocess.run')
+    def test_scan_artifacts_removed_after_analysis(self, mock_run, tmp_path, monkeypatch):
+        """Test the database and SARIF are deleted once findings are parsed"""
+        mock_run.return_value = Mock(returncode=0, stdout="CodeQL 2.11.0", stderr="")
+        
+        service = CodeQLService()
+        service.codeql_available = True
+        monkeypatch.setattr(service, 'db_dir', tmp_path / "dbs")
+        monkeypatch.setattr(service, 'cache_dir', tmp_path / "cache")
+        (tmp_path / "cache").mkdir()
+        monkeypatch.setattr(service, '_validate_repo_id', lambda repo_id: tmp_path)
+        
+        def fake_create(source_dir, db_path, language):
+            (db_path / "db-python").mkdir(parents=True)
+            return {"duration_seconds": 0.0}
+        
+        def fake_queries(db_path, language, suite, results_path):
+            results_path.write_text('{"runs": []}')
+            return {"duration_seconds": 0.0}
+        
+        monkeypatch.setattr(service, '_create_database', fake_create)
+        monkeypatch.setattr(service, '_run_queries', fake_queries)
+        
+        request = CodeQLScanRequest(repo_id="abcd1234", language="python")
+        response = service.analyze_repository(request)
+        
+        assert response.total_findings == 0
+        assert list((tmp_path / "dbs").iterdir()) == []
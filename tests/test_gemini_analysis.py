@@ -71,3 +71,71 @@ def test_perform_analysis_api_failure(mock_gemini_service):
     with pytest.raises(ValueError) as exc:
         mock_gemini_service.perform_analysis("Query", {}, {})
     assert "Analysis failed" in str(exc.value)
+
+def test_verify_evidence_citations(mock_gemini_service, capsys):
+    """Test citations match CodeQL locations or files in the context"""
+    findings = [
+        MagicMock(file_path="src/db.py", start_line=125),
+        MagicMock(file_path="my app/main.py", start_line=7),
+    ]
+    analysis = {"top_issues": [
+        {"title": "SQLi", "evidence": ["src/db.py:125-127"]},
+        {"title": "Context", "evidence": ["app.py:3", "app.py:9"]},
+        {"title": "Prefix only", "evidence": ["src/db.py:12"]},
+        {"title": "Backticked", "evidence": ["`src/db.py:125`"]},
+        {"title": "Parenthesized", "evidence": ["see (src/db.py:125)"]},
+        {"title": "Spaced path", "evidence": ["my app/main.py:7"]},
+    ]}
+    
+    mock_gemini_service._verify_evidence_citations(
+        analysis, findings, "--- START FILE: app.py ---"
+    )
+    
+    warnings = capsys.readouterr().out
+    assert "'Prefix only'" in warnings
+    assert "'SQLi'" not in warnings
+    assert "'Context'" not in warnings
+    assert "'Backticked'" not in warnings
+    assert "'Parenthesized'" not in warnings
+    assert "'Spaced path'" not in warnings
+
+def test_format_evidence_respects_budget(mock_gemini_service, monkeypatch):
+    """Test files beyond the evidence budget are named but not included"""
+    monkeypatch.setattr('services.gemini_service.MAX_EVIDENCE_CHARS', 80)
+    files = {"a.py": "x = 1\n" * 5, "big.py": "y = 2\n" * 50, "b.py": "z = 3"}
+    
+    evidence = mock_gemini_service._format_evidence(files)
+    
+    assert "--- START FILE: a.py ---" in evidence
+    assert "--- START FILE: b.py ---" in evidence
+    assert "--- START FILE: big.py ---" not in evidence
+    assert "OMITTED FILES (evidence limit reached): big.py" in evidence
+
+def test_fix_json_skipped_without_response(mock_gemini_service):
+    """Test no repair call is made when there is no response text"""
+    with pytest.raises(ValueError, match="skipped"):
+        mock_gemini_service._fix_json_with_gemini("  ", "analysis")
+    
+    mock_gemini_service.client.interactions.create.assert_not_called()
+
+def test_circuit_breaker_skips_calls_after_repeated_overload(mock_gemini_service):
+    """Test consecutive 429s open the breaker so later calls fail fast"""
+    from services.gemini_service import BREAKER_FAILURE_THRESHOLD
+    
+    overloaded = Exception("Too many requests")
+    overloaded.status_code = 429
+    mock_gemini_service.client.interactions.create.side_effect = overloaded
+    
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(Exception, match="Too many requests"):
+            mock_gemini_service._create_interaction(model="m", input="q")
+    
+    with pytest.raises(RuntimeError, match="overloaded"):
+        mock_gemini_service._create_interaction(model="m", input="q")
+    assert mock_gemini_service.client.interactions.create.call_count == BREAKER_FAILURE_THRESHOLD
+    
+    # Once the cooldown passes, calls go through and a success resets the count
+    mock_gemini_service._breaker_open_until = 0.0
+    mock_gemini_service.client.interactions.create.side_effect = None
+    assert mock_gemini_service._create_interaction(model="m", input="q") is not None
+    assert mock_gemini_service._breaker_failures == 0
@@ -48,3 +48,33 @@ def test_api_key_never_exposed():
             # Only hash should be present
             if service.gemini_available:
                 assert len(status["api_key_hash"]) == 8
+
+def test_gemini_service_shared_across_callers():
+    """Test the process-wide service is built (and verified) only once"""
+    from services.gemini_service import get_gemini_service
+    
+    with patch('services.gemini_service.GeminiService._verify_gemini') as mock_verify:
+        get_gemini_service.cache_clear()
+        try:
+            assert get_gemini_service() is get_gemini_service()
+            mock_verify.assert_called_once()
+        finally:
+            get_gemini_service.cache_clear()
+
+def test_gemini_verification_cached_across_instances(tmp_path, monkeypatch):
+    """Test a successful API check is reused instead of probing again"""
+    monkeypatch.setattr('services.gemini_service.VERIFY_CACHE_FILE', tmp_path / "verified.json")
+    
+    with patch('google.genai.Client') as mock_client:
+        mock_interaction = MagicMock()
+        mock_interaction.outputs = [MagicMock(text="OK")]
+        mock_client.return_value.interactions.create.return_value = mock_interaction
+        
+        with patch('config.settings.GEMINI_API_KEY', 'cached_key_12345678'):
+            assert GeminiService().gemini_available
+            assert GeminiService().gemini_available
+        
+        mock_client.return_value.interactions.create.assert_called_once()
+        
+        # The stored entry is a hash, never the key itself
+        assert "cached_key_12345678" not in (tmp_path / "verified.json").read_text()
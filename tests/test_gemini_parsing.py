@@ -44,6 +44,22 @@ def test_parse_markdown_no_lang(clean_service):
     assert result.name == "test"
     assert result.count == 3
 
+def test_parse_one_line_fence(clean_service):
+    """Test a fence without a newline after the opening backticks"""
+    json_str = '```{"name": "test", "count": 4}```'
+    result = clean_service.parse_response(json_str, SimpleModel)
+    assert result.count == 4
+
+def test_structured_output_strips_fence(clean_service):
+    """Test the registry parser shares parse_response's fence handling"""
+    plan = (
+        '{"investigation_areas": [{"area": "security", "aspects": ["auth"], '
+        '"tools": ["codeql"], "priority": 1}], "search_queries": ["login"], '
+        '"security_focus_areas": [], "expected_issues": []}'
+    )
+    data = clean_service._parse_structured_output(f"```json\n{plan}\n```", "analysis_plan", "test")
+    assert data["search_queries"] == ["login"]
+
 def test_parse_invalid_json(clean_service):
     """Test error handling for malformed JSON"""
     json_str = '{"name": "test", "count": }'  # Invalid JSON
@@ -76,3 +92,23 @@ def test_parse_analysis_plan_success(clean_service):
     assert result.approach == "Top-down analysis"
     assert len(result.files_to_read) == 1
     assert result.files_to_read[0].path == "main.py"
+
+def test_analysis_schema_requires_priority_order():
+    """Test top_issues must be ordered by priority (ties allowed)"""
+    from services.gemini_schemas import AnalysisSchema
+    
+    def issue(priority):
+        return {
+            "title": f"Issue {priority}",
+            "description": "Description long enough",
+            "severity": "high",
+            "evidence": ["app.py:1"],
+            "fix_steps": ["Fix it"],
+            "priority": priority
+        }
+    
+    analysis = {"architecture_summary": "x" * 50, "recommendations": ["Do it"]}
+    AnalysisSchema.model_validate({**analysis, "top_issues": [issue(1), issue(1), issue(3)]})
+    
+    with pytest.raises(ValidationError):
+        AnalysisSchema.model_validate({**analysis, "top_issues": [issue(2), issue(1)]})
@@ -51,6 +51,19 @@ class TestRepoSource:
         assert source.url is not None
         assert source.local_path is not None
 
+    def test_url_kept_as_given(self):
+        """Test URLs pass through unchanged (bar whitespace and scheme case) and non-HTTP URLs are rejected"""
+        source = RepoSource(url="https://github.com/user/repo")
+        assert source.url == "https://github.com/user/repo"
+
+        # Accepted like HttpUrl did: uppercase scheme, surrounding whitespace
+        assert RepoSource(url="HTTPS://github.com/a/b").url == "https://github.com/a/b"
+        assert RepoSource(url=" https://github.com/a/b ").url == "https://github.com/a/b"
+
+        for bad_url in ["ftp://github.com/user/repo", "https://", "github.com/user repo"]:
+            with pytest.raises(ValidationError):
+                RepoSource(url=bad_url)
+
 
 class TestIngestRequest:
     """Tests for IngestRequest model"""
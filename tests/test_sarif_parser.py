@@ -120,3 +120,74 @@ def test_unknown_severity_default():
     finally:
         if sarif_path.exists():
             sarif_path.unlink()
+
+def test_max_findings_short_circuits(tmp_path):
+    """Test parsing stops once max_findings is reached"""
+    result = SAMPLE_SARIF["runs"][0]["results"][0]
+    sarif_many = {
+        "runs": [{
+            "tool": SAMPLE_SARIF["runs"][0]["tool"],
+            "results": [result] * 10
+        }]
+    }
+    sarif_path = tmp_path / "many.sarif"
+    sarif_path.write_text(json.dumps(sarif_many))
+    
+    service = CodeQLService()
+    assert len(service._parse_sarif(sarif_path)) == 10
+    assert len(service._parse_sarif(sarif_path, max_findings=3)) == 3
+
+def test_max_findings_still_counts_all_results(tmp_path):
+    """Test findings past max_findings are counted and the response is marked truncated"""
+    from collections import Counter
+    
+    result = SAMPLE_SARIF["runs"][0]["results"][0]
+    note = dict(result, level="note")
+    sarif_many = {
+        "runs": [{
+            "tool": SAMPLE_SARIF["runs"][0]["tool"],
+            "results": [result] * 3 + [note] * 7
+        }]
+    }
+    sarif_path = tmp_path / "many.sarif"
+    sarif_path.write_text(json.dumps(sarif_many))
+    
+    service = CodeQLService()
+    overflow = Counter()
+    findings = service._parse_sarif(sarif_path, max_findings=4, overflow=overflow)
+    response = service._create_response("abcd1234", "python", findings, overflow)
+    
+    assert len(response.findings) == 4
+    assert response.truncated is True
+    assert response.total_findings == 10
+    assert response.critical_count == 3
+    assert response.medium_count == 7
+    
+    assert service._create_response("abcd1234", "python", findings).truncated is False
+
+def test_sarif_parsing_without_ijson(tmp_path, monkeypatch):
+    """Test the json.load fallback produces the same findings as streaming"""
+    import services.codeql_service as codeql_module
+    
+    sarif_path = tmp_path / "results.sarif"
+    sarif_path.write_text(json.dumps(SAMPLE_SARIF))
+    service = CodeQLService()
+    streamed = service._parse_sarif(sarif_path)
+    
+    monkeypatch.setattr(codeql_module, "IJSON_AVAILABLE", False)
+    loaded = service._parse_sarif(sarif_path)
+    
+    assert loaded == streamed
+    assert "parameterized queries" in loaded[0].recommendation
+
+def test_severity_level_case_insensitive(tmp_path):
+    """Test capitalized SARIF levels map like their lowercase form"""
+    result = json.loads(json.dumps(SAMPLE_SARIF["runs"][0]["results"][0]))
+    result["level"] = "Warning"
+    sarif = {"runs": [{"tool": SAMPLE_SARIF["runs"][0]["tool"], "results": [result]}]}
+    sarif_path = tmp_path / "cased.sarif"
+    sarif_path.write_text(json.dumps(sarif))
+    
+    findings = CodeQLService()._parse_sarif(sarif_path)
+    
+    assert findings[0].severity == SARIF_SEVERITY_MAP["warning"]
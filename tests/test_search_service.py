@@ -61,6 +61,13 @@ class TestSearchService:
         assert "authenticate_user" in results[0].code_snippet
         assert 0.0 <= results[0].relevance_score <= 1.0
     
+    def test_parse_seagoat_output_passes_validation(self, search_service):
+        """Test results built without validation would still pass it"""
+        results = search_service._parse_seagoat_output(MOCK_SEAGOAT_OUTPUT, 10)
+
+        for r in results:
+            assert SearchResult.model_validate(r.model_dump()) == r
+
     def test_parse_seagoat_output_deterministic(self, search_service):
         """Test that parsing is deterministic - same input produces same output"""
         results1 = search_service._parse_seagoat_output(MOCK_SEAGOAT_OUTPUT, 10)
@@ -204,6 +211,39 @@ class TestSearchService:
         assert call_args[1]["shell"] is False  # Verify no shell=True
         assert call_args[1]["timeout"] == 30
     
+    @patch('subprocess.run')
+    def test_search_reuses_recent_results(self, mock_run, search_service, sample_repo_structure, monkeypatch):
+        """Test a repeated query is answered from cache until TTL or re-index"""
+        mock_run.return_value = Mock(returncode=0, stdout=MOCK_SEAGOAT_OUTPUT, stderr="")
+        monkeypatch.setattr(
+            search_service,
+            'ingest_dir',
+            sample_repo_structure.parent.parent
+        )
+        request = SemanticSearchRequest(repo_id="test123", query="authentication", limit=10)
+
+        first = search_service.search(request)
+        assert search_service.search(request) is first
+        assert mock_run.call_count == 1
+
+        # A different limit is a different query
+        search_service.search(SemanticSearchRequest(repo_id="test123", query="authentication", limit=5))
+        assert mock_run.call_count == 2
+
+        # Expired entries are refreshed
+        import services.search_service as search_module
+        monkeypatch.setattr(search_module, 'SEARCH_CACHE_TTL', 0)
+        search_service.search(request)
+        assert mock_run.call_count == 3
+
+        # Re-indexing (one more subprocess call) drops the repository's entries
+        monkeypatch.setattr(search_module, 'SEARCH_CACHE_TTL', 30)
+        search_service.search(request)
+        assert mock_run.call_count == 3
+        search_service.index_repository("test123")
+        search_service.search(request)
+        assert mock_run.call_count == 5
+
     @patch('subprocess.run')
     def test_search_repository_not_found(self, mock_run, search_service):
         """Test searching non-existent repository"""
@@ -39,7 +39,100 @@ class TestIngestService:
         
         assert result == target_dir
         mock_clone.assert_called_once()
+        
+        # Only the branch tip is fetched
+        kwargs = mock_clone.call_args.kwargs
+        assert kwargs["depth"] == 1
+        assert kwargs["single_branch"] is True
+        assert kwargs["no_tags"] is True
     
+    @patch('git.Repo.clone_from')
+    def test_clone_repository_reuses_recent_clone(self, mock_clone, temp_workspace):
+        """Test re-ingesting the same URL copies the earlier clone"""
+        def fake_clone(url, target_dir, **kwargs):
+            (Path(target_dir) / ".git").mkdir(parents=True)
+            (Path(target_dir) / "main.py").write_text("print('hi')")
+        mock_clone.side_effect = fake_clone
+
+        service = IngestService()
+        first = service._clone_repository("https://github.com/test/repo", temp_workspace / "a")
+        second = service._clone_repository("https://github.com/test/repo.git/", temp_workspace / "b")
+
+        mock_clone.assert_called_once()
+        assert (second / "main.py").read_text() == "print('hi')"
+        assert first != second
+
+        # Clearing the cache forces a fresh clone
+        service.clear_clone_cache()
+        service._clone_repository("https://github.com/test/repo", temp_workspace / "c")
+        assert mock_clone.call_count == 2
+
+    def test_stale_clone_dropped_concurrently(self, temp_workspace):
+        """Test a stale clone entry another ingest already dropped is not an error"""
+        class RacingCache(dict):
+            def get(self, key, default=None):
+                # Another ingest invalidates the entry right after this read
+                return self.pop(key, default)
+
+        service = IngestService()
+        service._clone_cache = RacingCache({"github.com/test/repo": (0.0, temp_workspace / "gone")})
+
+        assert service._get_cached_clone("github.com/test/repo", "https://github.com/test/repo") is None
+
+    def test_ingest_reuses_output_for_unchanged_commit(self, temp_workspace):
+        """Test re-ingesting the same commit copies repo.md instead of regenerating it"""
+        import shutil
+        import subprocess
+
+        origin = temp_workspace / "origin"
+        origin.mkdir()
+        (origin / "main.py").write_text("print('hi')\n")
+        subprocess.run(["git", "init", "-q"], cwd=origin, check=True)
+        subprocess.run(["git", "add", "."], cwd=origin, check=True)
+        subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"],
+            cwd=origin, check=True
+        )
+
+        def fake_clone(url, target_dir):
+            shutil.copytree(origin, target_dir)
+            return target_dir
+
+        service = IngestService()
+        service.ingest_dir = temp_workspace / "ingest"
+        request = IngestRequest(source=RepoSource(url="https://github.com/test/repo"))
+
+        with patch.object(service, '_clone_repository', side_effect=fake_clone), \
+             patch.object(service, '_generate_repo_md', wraps=service._generate_repo_md) as mock_md:
+            first = service.ingest_repository(request)
+            # Date the first output in the past to see the copy's own timestamp
+            first_md = Path(first.repo_md_path)
+            first_lines = first_md.read_text().splitlines()
+            first_lines[2] = "Generated: 2000-01-01T00:00:00"
+            first_md.write_text("\n".join(first_lines) + "\n")
+            second = service.ingest_repository(request)
+
+        mock_md.assert_called_once()
+        assert second.repo_id != first.repo_id
+        second_lines = Path(second.repo_md_path).read_text().splitlines()
+        assert second_lines[3:] == first_lines[3:]
+        # The copy is dated by this ingest, not the one it came from
+        assert second_lines[2].startswith("Generated: 20")
+        assert second_lines[2] > first_lines[2]
+        assert Path(second.tree_json_path).exists()
+        assert second.file_count == first.file_count
+
+    def test_ingest_caches_evict_oldest(self, monkeypatch):
+        """Test clone/output caches keep at most INGEST_CACHE_SIZE entries, oldest evicted first"""
+        monkeypatch.setattr('services.ingest_service.INGEST_CACHE_SIZE', 2)
+        service = IngestService()
+        
+        for key in ["a", "b", "a", "c"]:
+            service._store_cached(service._clone_cache, key, (0.0, Path(key)))
+        
+        # "a" was stored again after "b", so "b" was the oldest
+        assert list(service._clone_cache) == ["a", "c"]
+
     @patch('git.Repo.clone_from')
     def test_clone_repository_failure(self, mock_clone):
         """Test repository cloning failure"""
@@ -77,7 +170,34 @@ class TestIngestService:
         
         assert was_truncated is True
         assert len(content.encode('utf-8')) <= MAX_BYTES_PER_FILE
-    
+
+    def test_read_file_safe_truncation_keeps_utf8(self, temp_workspace):
+        """Test a multi-byte character cut at the limit doesn't force Latin-1"""
+        from services.ingest_service import MAX_BYTES_PER_FILE
+
+        # "é" is 2 bytes, so the limit falls inside a character
+        test_file = temp_workspace / "accents.txt"
+        test_file.write_text("a" + "é" * MAX_BYTES_PER_FILE, encoding='utf-8')
+
+        service = IngestService()
+        content, was_truncated = service._read_file_safe(test_file)
+
+        assert was_truncated is True
+        assert content == "a" + "é" * ((MAX_BYTES_PER_FILE - 1) // 2)
+
+    def test_read_file_safe_exact_limit(self, temp_workspace):
+        """Test a file of exactly MAX_BYTES_PER_FILE is not reported truncated"""
+        from services.ingest_service import MAX_BYTES_PER_FILE
+
+        test_file = temp_workspace / "exact.txt"
+        test_file.write_bytes(b"a" * MAX_BYTES_PER_FILE)
+
+        service = IngestService()
+        content, was_truncated = service._read_file_safe(test_file)
+
+        assert was_truncated is False
+        assert len(content) == MAX_BYTES_PER_FILE
+
     def test_is_text_content(self):
         """Test text content detection"""
         service = IngestService()
@@ -106,6 +226,25 @@ class TestIngestService:
         assert ".py" in stats["languages"]
         assert ".md" in stats["languages"]
     
+    def test_calculate_stats_line_endings(self, temp_workspace, monkeypatch):
+        """Test line totals match text-mode reading for LF, CRLF and CR-only files"""
+        repo_dir = temp_workspace / "test-repo"
+        repo_dir.mkdir()
+        contents = [b"a\nb\n", b"a\r\nb\r\nc", b"a\rb\rc\r", b"a\r\r\nb\n\rc"]
+        for i, content in enumerate(contents):
+            (repo_dir / f"file{i}.py").write_bytes(content)
+        expected = sum(
+            len((repo_dir / f"file{i}.py").read_text().splitlines())
+            for i in range(len(contents))
+        )
+        
+        service = IngestService()
+        assert service._calculate_stats(repo_dir, [], [])["total_lines"] == expected
+        
+        # "\r\n" split across read blocks is still one line ending
+        monkeypatch.setattr('services.ingest_service.LINE_COUNT_BLOCK_SIZE', 2)
+        assert service._calculate_stats(repo_dir, [], [])["total_lines"] == expected
+    
     def test_calculate_stats_with_exclusions(self, temp_workspace):
         """Test stats calculation with exclusion patterns"""
         repo_dir = temp_workspace / "test-repo"
@@ -124,6 +263,71 @@ class TestIngestService:
         # Should exclude README.md
         assert stats["file_count"] == 2
     
+    def test_iter_files_prunes_excluded_directories(self, temp_workspace):
+        """Test the directory walk skips excluded directories and filters names"""
+        repo_dir = temp_workspace / "test-repo"
+        (repo_dir / "node_modules" / "pkg").mkdir(parents=True)
+        (repo_dir / "node_modules" / "pkg" / "index.js").write_text("x")
+        (repo_dir / "src").mkdir()
+        (repo_dir / "src" / "app.py").write_text("code")
+        (repo_dir / "README.md").write_text("docs")
+        
+        service = IngestService()
+        with patch('os.scandir', wraps=__import__('os').scandir) as mock_scandir:
+            files = list(service.iter_files(repo_dir, ["*.py", "*.js"], ["node_modules/*"]))
+        
+        assert files == [repo_dir / "src" / "app.py"]
+        scanned = [str(call.args[0]) for call in mock_scandir.call_args_list]
+        assert not any("node_modules" in path for path in scanned)
+    
+    def test_iter_files_respects_gitignore(self, temp_workspace):
+        """Test git checkouts are listed via git ls-files (honoring .gitignore)"""
+        import subprocess
+        
+        repo_dir = temp_workspace / "git-repo"
+        repo_dir.mkdir()
+        subprocess.run(["git", "init", "-q"], cwd=repo_dir, check=True)
+        (repo_dir / ".gitignore").write_text("secrets.py\n")
+        (repo_dir / "secrets.py").write_text("KEY = 1")
+        (repo_dir / "main.py").write_text("code")
+        
+        service = IngestService()
+        names = sorted(p.name for p in service.iter_files(repo_dir, ["*.py"], []))
+        
+        assert names == ["main.py"]
+
+    def test_compiled_globs_match_fnmatch(self):
+        """Test the combined glob matcher agrees with per-pattern fnmatch"""
+        from fnmatch import fnmatch
+        from services.ingest_service import _compile_globs
+
+        patterns = ("*.py", "node_modules/*", "[!t]est_?.js", "build/*")
+        matches = _compile_globs(patterns)
+
+        for name in ["app.py", "node_modules/x/y.js", "best_1.js", "test_1.js", "build", "src/app.pyc"]:
+            assert bool(matches(name)) == any(fnmatch(name, p) for p in patterns), name
+        assert _compile_globs(patterns) is matches
+
+    def test_get_file_structure_limit(self, temp_workspace):
+        """Test get_file_structure returns at most `limit` relative paths"""
+        service = IngestService()
+        service.ingest_dir = temp_workspace
+        source_dir = temp_workspace / "abcd1234" / "source"
+        (source_dir / "pkg").mkdir(parents=True)
+        for i in range(5):
+            (source_dir / "pkg" / f"mod{i}.py").write_text("code")
+        
+        structure = service.get_file_structure("abcd1234", limit=3)
+        
+        assert len(structure) == 3
+        assert all(path.startswith("pkg/") for path in structure)
+        assert service.get_file_structure("missing1") == []
+
+        # The same listing is served again without walking the repository
+        with patch.object(service, 'iter_files') as mock_iter:
+            assert service.get_file_structure("abcd1234", limit=3) == structure
+        mock_iter.assert_not_called()
+    
     def test_generate_tree_json(self, temp_workspace):
         """Test tree.json generation"""
         import json
@@ -148,7 +352,19 @@ class TestIngestService:
         
         assert tree["type"] == "directory"
         assert "children" in tree
-    
+
+        # Sorted by name, hidden entries skipped, files carry their size
+        (repo_dir / ".hidden").write_text("x")
+        service._generate_tree_json(repo_dir, output_path)
+        with open(output_path) as f:
+            tree = json.load(f)
+        assert tree["children"] == [
+            {"type": "file", "name": "file1.py", "size": 4},
+            {"type": "directory", "name": "subdir", "children": [
+                {"type": "file", "name": "file2.py", "size": 4}
+            ]}
+        ]
+
     def test_generate_signature(self, temp_workspace):
         """Test signature generation"""
         repo_dir = temp_workspace / "test-repo"
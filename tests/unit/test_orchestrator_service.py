@@ -65,6 +65,9 @@ class TestOrchestratorService:
             with open(plan_file) as f:
                 loaded_plan = json.load(f)
             assert loaded_plan["plan_id"] == plan["plan_id"]
+            
+            # Written via a temp file that is renamed into place
+            assert list(service.plans_dir.glob("*.tmp")) == []
     
     def test_generate_signature(self, sample_orchestrator_request):
         """Test HMAC signature generation"""
@@ -213,3 +216,147 @@ class TestOrchestratorService:
         
         loaded_plan = service._load_plan("nonexistent_plan")
         assert loaded_plan is None
+    
+    def test_plan_persisted_in_signed_canonical_form(self, sample_orchestrator_request, tmp_path):
+        """Test the plan file holds exactly the bytes clients sign"""
+        import hmac, hashlib
+        
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            service.plans_dir = tmp_path / "plans"
+            service.plans_dir.mkdir(parents=True, exist_ok=True)
+            service.secret_key = "test_secret_key"
+            
+            plan = service.create_analysis_plan(sample_orchestrator_request)
+            plan_file = service.plans_dir / f"{plan['plan_id']}.json"
+            
+            # Client-side signing recipe from the API docs
+            plan_json = json.dumps(plan, sort_keys=True)
+            assert plan_file.read_text() == plan_json
+            signature = hmac.new(
+                b"test_secret_key",
+                f"{plan_json}:user@test.com".encode(),
+                hashlib.sha256
+            ).hexdigest()
+            
+            assert service.load_approved_plan(plan["plan_id"], "user@test.com", signature) == plan
+            
+            # Plans stored as indented JSON (older format) still verify
+            plan_file.write_text(json.dumps(plan, indent=2))
+            assert service.load_approved_plan(plan["plan_id"], "user@test.com", signature) == plan
+    
+    def test_invalid_signature_hashed_once(self, sample_orchestrator_request, tmp_path):
+        """Test a rejected signature on a canonical plan costs a single HMAC, no re-serialization"""
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            service.plans_dir = tmp_path / "plans"
+            service.plans_dir.mkdir(parents=True, exist_ok=True)
+            service.secret_key = "test_secret_key"
+            
+            plan = service.create_analysis_plan(sample_orchestrator_request)
+            
+            with patch.object(service, '_canonical_plan_bytes', wraps=service._canonical_plan_bytes) as canonical, \
+                 patch.object(service, '_sign', wraps=service._sign) as sign:
+                with pytest.raises(PermissionError):
+                    service.load_approved_plan(plan["plan_id"], "user@test.com", "bad")
+            
+            assert sign.call_count == 1
+            canonical.assert_not_called()
+
+    def test_verify_approvals_batch(self, sample_orchestrator_request, tmp_path):
+        """Test batch verification returns one result per approval, in order"""
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            service.plans_dir = tmp_path / "plans"
+            service.plans_dir.mkdir(parents=True, exist_ok=True)
+            service.secret_key = "test_secret_key"
+
+            plans = [service.create_analysis_plan(sample_orchestrator_request) for _ in range(3)]
+            approvals = [
+                (plan["plan_id"], "user@test.com", service.generate_signature(plan, "user@test.com"))
+                for plan in plans
+            ]
+            approvals[1] = (approvals[1][0], "user@test.com", "bad")
+            approvals.append(("plan_missing", "user@test.com", "sig"))
+
+            assert service.verify_approvals(approvals) == [True, False, True, False]
+            assert service.verify_approvals(approvals[:1]) == [True]
+    
+    def test_load_plan_cached_until_file_changes(self, sample_orchestrator_request, tmp_path):
+        """Test repeated loads are served from memory until the plan is rewritten"""
+        import builtins
+        
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            service.plans_dir = tmp_path / "plans"
+            service.plans_dir.mkdir(parents=True, exist_ok=True)
+            
+            plan = service.create_analysis_plan(sample_orchestrator_request)
+            
+            with patch('builtins.open', wraps=builtins.open) as mock_open:
+                service._load_plan(plan["plan_id"])
+                service._load_plan(plan["plan_id"])
+            assert mock_open.call_count == 1
+            
+            # Rewriting the plan (as execution does) invalidates the entry
+            plan["status"] = "completed"
+            service._persist_plan(plan)
+            assert service._load_plan(plan["plan_id"])["status"] == "completed"
+    
+    def test_get_plan_json_returns_stored_bytes(self, sample_orchestrator_request, tmp_path):
+        """Test the raw plan JSON is returned without re-encoding"""
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            service.plans_dir = tmp_path / "plans"
+            service.plans_dir.mkdir(parents=True, exist_ok=True)
+            
+            plan = service.create_analysis_plan(sample_orchestrator_request)
+            
+            raw = service.get_plan_json(plan["plan_id"])
+            assert raw == json.dumps(plan, sort_keys=True).encode()
+            assert service.get_plan_json("nonexistent_plan") is None
+    
+    def test_create_analysis_plan_json_returns_written_bytes(self, sample_orchestrator_request, tmp_path):
+        """Test plan creation hands back the canonical bytes it stored"""
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            service.plans_dir = tmp_path / "plans"
+            service.plans_dir.mkdir(parents=True, exist_ok=True)
+            
+            plan, raw = service.create_analysis_plan_json(sample_orchestrator_request)
+            
+            assert raw == json.dumps(plan, sort_keys=True).encode()
+            assert raw == (service.plans_dir / f"{plan['plan_id']}.json").read_bytes()
+    
+    def test_read_evidence_file_bounded(self, tmp_path):
+        """Test evidence files are read up to MAX_EVIDENCE_FILE_BYTES only"""
+        from services.orchestrator import MAX_EVIDENCE_FILE_BYTES
+        
+        small = tmp_path / "small.py"
+        small.write_text("print('ok')\n")
+        large = tmp_path / "large.py"
+        large.write_bytes(b"x" * (MAX_EVIDENCE_FILE_BYTES + 1))
+        
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+            
+            assert service._read_evidence_file(small) == "print('ok')\n"
+            assert service._read_evidence_file(large) == "(File too large)"
+
+    def test_read_evidence_files_keeps_plan_order(self, tmp_path):
+        """Test concurrent evidence reads keep plan order and skip bad paths"""
+        repo = tmp_path / "source"
+        repo.mkdir()
+        for name in ["a.py", "b.py", "c.py"]:
+            (repo / name).write_text(name)
+        (tmp_path / "secret.txt").write_text("nope")
+
+        with patch.object(OrchestratorService, '__init__', lambda self: None):
+            service = OrchestratorService()
+
+            contents = service._read_evidence_files(repo, [
+                {"path": "c.py"}, {"path": "../secret.txt"},
+                {"path": "missing.py"}, {"path": "a.py"}, {"path": "b.py"}
+            ])
+
+            assert list(contents.items()) == [("c.py", "c.py"), ("a.py", "a.py"), ("b.py", "b.py")]
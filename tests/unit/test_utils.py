@@ -103,6 +103,29 @@ class TestLogger:
         clear_request_id()
         assert request_id_var.get() is None
 
+    def test_queue_handler_captures_request_context(self):
+        """Test records carry the caller's request ID to the listener thread"""
+        import logging
+        import queue
+        from utils.logger import ContextQueueHandler, StructuredFormatter
+
+        log_queue = queue.SimpleQueue()
+        handler = ContextQueueHandler(log_queue)
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "value=%s", ("x",), None)
+
+        set_request_id("req_queued")
+        try:
+            handler.emit(record)
+        finally:
+            clear_request_id()
+
+        queued = log_queue.get_nowait()
+        assert queued.getMessage() == "value=x"
+
+        # Formatting later (no request context) still uses the captured ID
+        formatted = StructuredFormatter().format(queued)
+        assert "req_queued" in formatted
+
 
 class TestMetricsCollector:
     """Test suite for metrics collection"""
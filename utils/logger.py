@@ -4,7 +4,10 @@ Structured JSON logging with request IDs and secret filtering
 """
 
 import logging
+import logging.handlers
+import atexit
 import json
+import queue
 import sys
 from typing import Any, Dict, Optional
 from datetime import datetime
@@ -66,8 +69,9 @@ class StructuredFormatter(logging.Formatter):
             "message": record.getMessage()
         }
         
-        # Add request ID if available
-        request_id = request_id_var.get()
+        # Add request ID if available (captured by the queue handler when
+        # formatting runs on the listener thread)
+        request_id = getattr(record, "request_id", None) or request_id_var.get()
         if request_id:
             log_entry["request_id"] = request_id
         
@@ -93,22 +97,60 @@ class StructuredFormatter(logging.Formatter):
             return text
 
 
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that defers formatting to the listener thread
+    
+    Only the cheap, context-dependent parts are resolved on the calling
+    thread: the message arguments and the request ID context variable.
+    JSON encoding, traceback formatting and the stdout write happen in the
+    QueueListener thread.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = request_id_var.get()
+        return record
+
+
+# Background listener draining the log queue (started by setup_logging)
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_queue_listener():
+    """
+    Flush pending log records and stop the listener thread
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
 def setup_logging():
     """
     Configure centralized logging
     """
+    global _queue_listener
+    
     # Determine log level
     log_level = logging.DEBUG if settings.DEBUG else getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     
-    # Create handler
+    # Create handler; it runs on the listener thread, off the request path
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(StructuredFormatter())
     
+    _stop_queue_listener()
+    log_queue = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(log_queue, handler)
+    _queue_listener.start()
+    
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     root_logger.handlers.clear()
-    root_logger.addHandler(handler)
+    root_logger.addHandler(ContextQueueHandler(log_queue))
     
     # Reduce noise from third-party libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -162,3 +204,4 @@ class StructuredLogger(logging.LoggerAdapter):
 
 # Initialize logging on module import
 setup_logging()
+atexit.register(_stop_queue_listener)
@@ -5,16 +5,26 @@ Simple in-memory metrics for request tracking
 
 from typing import Dict
 from datetime import datetime
+from collections import deque
 import threading
 
 
+# Pending records are folded into the counters once this many accumulate
+# (or whenever metrics are read)
+FLUSH_BATCH_SIZE = 256
+
+
 class MetricsCollector:
     """
     Thread-safe in-memory metrics collector
+    
+    Recording only appends to a deque (atomic, no lock); records are
+    aggregated in batches under the lock.
     """
     
     def __init__(self):
         self._lock = threading.Lock()
+        self._pending = deque()
         self.request_count = 0
         self.request_by_endpoint: Dict[str, int] = {}
         self.request_by_status: Dict[int, int] = {}
@@ -32,7 +42,23 @@ class MetricsCollector:
         """
         Record a completed request
         """
-        with self._lock:
+        self._pending.append((method, endpoint, status_code, duration_ms))
+        
+        if len(self._pending) >= FLUSH_BATCH_SIZE:
+            with self._lock:
+                self._flush()
+    
+    def _flush(self):
+        """
+        Fold pending records into the counters (caller holds the lock)
+        """
+        pending = self._pending
+        while pending:
+            try:
+                method, endpoint, status_code, duration_ms = pending.popleft()
+            except IndexError:
+                break
+            
             self.request_count += 1
             
             # Track by endpoint
@@ -52,6 +78,7 @@ class MetricsCollector:
         Get current metrics snapshot
         """
         with self._lock:
+            self._flush()
             uptime_seconds = (datetime.utcnow() - self.start_time).total_seconds()
             
             return {
@@ -72,6 +99,7 @@ class MetricsCollector:
         Reset all metrics (useful for testing)
         """
         with self._lock:
+            self._pending.clear()
             self.request_count = 0
             self.request_by_endpoint.clear()
             self.request_by_status.clear()